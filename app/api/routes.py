@@ -1,60 +1,561 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
 from uuid import uuid4
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
+import asyncio
+import json
+import time
 
 from app.schemas.requests import (
     ChatRequest, ChatResponse, 
+    BatchChatRequest, BatchChatResult, BatchChatResponse, JobInfo,
     ModelInfo, AvailableModelsResponse
 )
+from app.core.admission import AdmissionController, AdmissionRejectedError, AdmissionTicket
+from app.core.config import settings
 from app.core.context import ContextManager
+from app.core.executor import ExecutorQueueFullError
+from app.core.jobs import JobStore, JobStoreFullError
+from app.core.metrics import REQUEST_LATENCY
+from app.core.stopping import Deadline
+from app.core.windowing import annotate_token_counts, fit_context_to_budget, has_token_count, message_token_count
 from app.models.router import ModelRouter
 
 router = APIRouter()
 context_manager = ContextManager()
 model_router = ModelRouter()
+admission = AdmissionController()
+# 컨텍스트 스토리지가 SQLite면 같은 스토어에 작업도 저장
+job_store = JobStore(getattr(context_manager, "store", None))
+
+class ClientDisconnectedError(Exception):
+    """응답을 기다리던 클라이언트의 연결이 끊김"""
+    pass
+
+async def _cancel_on_disconnect(http_request: Request, awaitable: Awaitable[Any]) -> Any:
+    """
+    awaitable을 실행하면서 클라이언트 연결 종료를 주기적으로 확인
+    끊기면 awaitable을 취소하고 (모델 생성은 다음 디코딩 스텝에서 멈춤) ClientDisconnectedError 발생
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_MS / 1000)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected() and not task.done():
+                raise ClientDisconnectedError()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def _priority(request: ChatRequest, default: Optional[str] = None) -> str:
+    """요청의 우선순위 클래스 (알 수 없는 클래스면 400)"""
+    priority = request.priority or default or settings.DEFAULT_PRIORITY
+    if priority not in settings.PRIORITY_WEIGHTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 우선순위입니다: {priority} (가능한 값: {', '.join(settings.PRIORITY_WEIGHTS)})"
+        )
+    return priority
+
+async def _extend_context(session_id: str, context: List[Dict[str, Any]], new_messages: List[Dict[str, Any]], model):
+    """
+    컨텍스트에 새 메시지를 토큰 수와 함께 추가하고 저장소에는 새 메시지만 기록
+    기존 메시지에 이 모델의 토큰 수가 없으면 (모델 변경, 토큰 수 저장 이전 세션) 이번에 계산한 값과 함께
+    전체를 다시 기록해 세션·모델별로 한 번만 토큰화
+    """
+    # 모델 로드 전이나 워커 프로세스 모드에서도 추정치가 아닌 실제 토큰 수를 저장하도록 토크나이저 준비
+    await model.ensure_tokenizer()
+    stale = not all(has_token_count(message, model) for message in context)
+    annotate_token_counts(context, model)
+    context.extend(annotate_token_counts(new_messages, model))
+    if stale and all(has_token_count(message, model) for message in context):
+        await context_manager.update_context(session_id, context)
+    elif new_messages:
+        await context_manager.append_messages(session_id, new_messages)
+
+async def _load_context(request: ChatRequest, model) -> List[Dict[str, Any]]:
+    """세션 컨텍스트에 새 메시지를 추가하고 토큰 예산에 맞게 자른 모델 입력 반환"""
+    # 컨텍스트 검색 또는 생성
+    context = await context_manager.get_context(request.session_id) or []
+    
+    # 메시지가 있으면 토큰 수와 함께 새 메시지만 로그에 추가
+    await _extend_context(
+        request.session_id, context, [message.dict() for message in request.messages], model
+    )
+    
+    # 토큰 예산에 맞게 시스템 프롬프트 + 최근 메시지만 모델에 전달
+    return fit_context_to_budget(context, model)
+
+async def _save_response(request: ChatRequest, model, response: str):
+    """응답을 컨텍스트에 추가 (필요한 경우)"""
+    if request.save_context and response:
+        await context_manager.append_messages(
+            request.session_id,
+            annotate_token_counts([{"role": "assistant", "content": response}], model)
+        )
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     메인 채팅 엔드포인트 - 요청에 따라 적절한 모델로 라우팅
     """
+    start = time.perf_counter()
+    
     # 세션 ID가 없으면 새로 생성
     if not request.session_id:
         request.session_id = str(uuid4())
     
-    # 컨텍스트 검색 또는 생성
-    context = context_manager.get_context(request.session_id)
-    if not context and request.messages:
-        context = []
-    
-    # 메시지가 있으면 컨텍스트에 추가
-    if request.messages:
-        context.extend(request.messages)
-        context_manager.update_context(request.session_id, context)
-    
     # 모델 결정 (태스크 또는 요청에 따라)
     model_name = request.model if request.model else "default"
     model = model_router.get_model(model_name)
+    mode = "stream" if request.stream else "generate"
+    
+    # 승인 제어 - 동시 처리 한도를 넘으면 우선순위/공정성 순서로 대기하고, 대기열이 가득 차면 바로 거절
+    priority = _priority(request)
+    parameters = request.parameters or {}
+    
+    # 요청 마감 - 승인 대기는 마감까지만 기다리고, 생성은 마감이 지나면 그때까지의 결과로 응답
+    timeout_ms = request.timeout_ms or settings.GENERATION_TIMEOUT_MS
+    deadline = Deadline(timeout_ms / 1000) if timeout_ms > 0 else None
+    
+    try:
+        ticket = await _cancel_on_disconnect(http_request, admission.acquire(
+            model.name,
+            flow=request.client_id or request.session_id,
+            priority=priority,
+            cost=parameters.get("max_new_tokens", settings.MAX_NEW_TOKENS),
+            timeout=deadline.remaining() if deadline else None
+        ))
+    except AdmissionRejectedError as e:
+        REQUEST_LATENCY.labels(model.name, mode, str(e.status_code)).observe(time.perf_counter() - start)
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ClientDisconnectedError:
+        REQUEST_LATENCY.labels(model.name, mode, "499").observe(time.perf_counter() - start)
+        raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겼습니다")
+    
+    try:
+        context = await _load_context(request, model)
+        
+        # 스트리밍 모드: 토큰을 Server-Sent Events로 전송 (슬롯은 스트림이 끝날 때 반납)
+        # 연결이 끊기면 Starlette가 스트림을 취소하고, 모델은 생성 중인 스레드를 멈춤
+        if request.stream:
+            return StreamingResponse(
+                _stream_chat(request, context, model, start, ticket, deadline),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                # 스트림이 시작되기 전에 연결이 끊긴 경우에도 슬롯 반납
+                background=BackgroundTask(ticket.release)
+            )
+    except BaseException:
+        ticket.release()
+        raise
     
-    # 모델 추론 실행
+    # 모델 추론 실행 (클라이언트 연결이 끊기면 생성 취소)
+    status = "200"
     try:
-        response = await model.generate(
+        response = await _cancel_on_disconnect(http_request, model.generate(
             context=context,
-            parameters=request.parameters or {}
+            parameters=request.parameters or {},
+            session_id=request.session_id,
+            deadline=deadline
+        ))
+        await _save_response(request, model, response)
+        
+        return ChatResponse(
+            session_id=request.session_id,
+            response=response,
+            model=model.name,
+            truncated=bool(deadline and deadline.truncated)
+        )
+    except ExecutorQueueFullError as e:
+        status = "503"
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ClientDisconnectedError:
+        status = "499"
+        raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겼습니다")
+    except Exception as e:
+        status = "500"
+        raise HTTPException(status_code=500, detail=f"모델 추론 오류: {str(e)}")
+    finally:
+        ticket.release()
+        REQUEST_LATENCY.labels(model.name, mode, status).observe(time.perf_counter() - start)
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Server-Sent Events 프레임 생성"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_chat(request: ChatRequest, context: List[Dict[str, Any]], model, start: float,
+                       ticket: AdmissionTicket, deadline: Optional[Deadline]) -> AsyncIterator[str]:
+    """
+    스트리밍 채팅 - 생성되는 토큰을 전송하고 완료 후 전체 응답을 컨텍스트에 저장
+    """
+    chunks = []
+    status = "499"  # 응답 완료 전에 클라이언트 연결이 끊긴 경우
+    try:
+        async for text in model.stream(
+            context=context,
+            parameters=request.parameters or {},
+            session_id=request.session_id,
+            deadline=deadline
+        ):
+            chunks.append(text)
+            yield _sse({"token": text})
+        
+        response = "".join(chunks)
+        await _save_response(request, model, response)
+        status = "200"
+    except ExecutorQueueFullError as e:
+        status = "503"
+        yield _sse({"status_code": 503, "detail": str(e)}, event="error")
+        return
+    except Exception as e:
+        status = "500"
+        yield _sse({"status_code": 500, "detail": f"모델 추론 오류: {str(e)}"}, event="error")
+        return
+    finally:
+        ticket.release()
+        REQUEST_LATENCY.labels(model.name, "stream", status).observe(time.perf_counter() - start)
+    
+    yield _sse(
+        {
+            "session_id": request.session_id,
+            "response": response,
+            "model": model.name,
+            "truncated": bool(deadline and deadline.truncated)
+        },
+        event="done"
+    )
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(batch: BatchChatRequest, http_request: Request):
+    """
+    배치 채팅 엔드포인트 - 독립적인 요청 묶음을 모델별로 나눠 프롬프트 길이순으로 실행
+    비슷한 길이의 요청이 함께 배치 generate로 묶여 패딩이 줄어듦
+    결과는 입력 순서로 반환하고, stream이면 끝나는 순서대로 NDJSON으로 전송
+    """
+    if len(batch.requests) > settings.CHAT_BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"배치 요청은 최대 {settings.CHAT_BATCH_MAX_REQUESTS}개까지 가능합니다 ({len(batch.requests)}개)"
         )
+    
+    # 해석된 모델별로 묶음
+    groups: Dict[str, List[Any]] = {}
+    models = {}
+    for index, request in enumerate(batch.requests):
+        model = model_router.get_model(request.model if request.model else "default")
+        models[model.name] = model
+        groups.setdefault(model.name, []).append((index, request))
+    
+    # 배치 전체를 하나의 공정 스케줄링 단위로 처리해 다른 클라이언트를 밀어내지 않도록 함
+    flow = f"batch-{uuid4()}"
+    results: List[Optional[BatchChatResult]] = [None] * len(batch.requests)
+    completed: asyncio.Queue = asyncio.Queue()
+    
+    def finish(index: int, status_code: int, result: Optional[ChatResponse] = None, detail: Optional[str] = None):
+        results[index] = BatchChatResult(index=index, status_code=status_code, result=result, detail=detail)
+        completed.put_nowait(results[index])
+    
+    async def run_group(model, items: List[Any]):
+        async def prepare(index: int, request: ChatRequest):
+            if not request.session_id:
+                request.session_id = str(uuid4())
+            try:
+                _priority(request, settings.CHAT_BATCH_PRIORITY)
+                context = await _load_context(request, model)
+            except HTTPException as e:
+                finish(index, e.status_code, detail=e.detail)
+                return None
+            except Exception as e:
+                finish(index, 500, detail=f"컨텍스트 처리 오류: {str(e)}")
+                return None
+            return index, request, context
         
-        # 응답을 컨텍스트에 추가 (필요한 경우)
-        if request.save_context and response:
-            context.append({"role": "assistant", "content": response})
-            context_manager.update_context(request.session_id, context)
+        prepared = [item for item in await asyncio.gather(*(prepare(*item) for item in items)) if item]
+        # 짧은 프롬프트부터 실행 - 동시에 실행되는 요청끼리 배치로 묶이므로 길이가 비슷해짐
+        prepared.sort(key=lambda item: sum(message_token_count(message, model) for message in item[2]))
+        
+        pending = iter(prepared)
+        concurrency = settings.CHAT_BATCH_CONCURRENCY or settings.BATCH_MAX_SIZE * model.executor.max_workers
+        
+        async def worker():
+            for index, request, context in pending:
+                try:
+                    result = await _run_chat_item(
+                        request, model, context, flow, "batch", settings.CHAT_BATCH_PRIORITY
+                    )
+                    finish(index, 200, result=result)
+                except HTTPException as e:
+                    finish(index, e.status_code, detail=e.detail)
+        
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(prepared)))))
+    
+    async def run_all():
+        await asyncio.gather(*(run_group(models[name], items) for name, items in groups.items()))
+    
+    if batch.stream:
+        return StreamingResponse(
+            _stream_batch(run_all, completed, len(batch.requests)),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    try:
+        await _cancel_on_disconnect(http_request, run_all())
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겼습니다")
+    return BatchChatResponse(results=results)
+
+async def _run_chat_item(request: ChatRequest, model, context: List[Dict[str, Any]], flow: str,
+                         mode: str, default_priority: Optional[str] = None) -> ChatResponse:
+    """
+    응답을 기다리는 클라이언트 없이 요청 하나 실행 (배치 항목, 비동기 작업)
+    승인 제어를 거쳐 generate, 실패하면 HTTPException
+    """
+    start = time.perf_counter()
+    parameters = request.parameters or {}
+    timeout_ms = request.timeout_ms or settings.GENERATION_TIMEOUT_MS
+    deadline = Deadline(timeout_ms / 1000) if timeout_ms > 0 else None
+    priority = _priority(request, default_priority)
+    
+    status = "200"
+    try:
+        ticket = await admission.acquire(
+            model.name,
+            flow=request.client_id or flow,
+            priority=priority,
+            cost=parameters.get("max_new_tokens", settings.MAX_NEW_TOKENS),
+            timeout=deadline.remaining() if deadline else None
+        )
+        try:
+            response = await model.generate(
+                context=context,
+                parameters=parameters,
+                session_id=request.session_id,
+                deadline=deadline
+            )
+        finally:
+            ticket.release()
+        await _save_response(request, model, response)
         
         return ChatResponse(
             session_id=request.session_id,
             response=response,
-            model=model.name
+            model=model.name,
+            truncated=bool(deadline and deadline.truncated)
         )
+    except AdmissionRejectedError as e:
+        status = str(e.status_code)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ExecutorQueueFullError as e:
+        status = "503"
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        status = "500"
         raise HTTPException(status_code=500, detail=f"모델 추론 오류: {str(e)}")
+    finally:
+        REQUEST_LATENCY.labels(model.name, mode, status).observe(time.perf_counter() - start)
+
+async def _stream_batch(run: Callable[[], Awaitable[None]], completed: asyncio.Queue, total: int) -> AsyncIterator[str]:
+    """
+    배치 결과를 끝나는 순서대로 NDJSON 한 줄씩 전송 (연결이 끊기면 남은 항목 취소)
+    응답 전송이 시작될 때 run()을 실행하므로 스트림을 읽지 않으면 아무 항목도 실행하지 않음
+    """
+    task = asyncio.ensure_future(run())
+    try:
+        for _ in range(total):
+            result = await completed.get()
+            yield json.dumps(result.dict(), ensure_ascii=False) + "\n"
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+@router.post("/jobs", response_model=JobInfo, status_code=202)
+async def create_job(request: ChatRequest):
+    """
+    비동기 작업 생성 - 생성을 백그라운드에서 실행하고 작업 ID를 바로 반환
+    결과는 GET /api/jobs/{job_id}로 조회 (요청의 stream은 무시)
+    """
+    if not request.session_id:
+        request.session_id = str(uuid4())
+    model = model_router.get_model(request.model if request.model else "default")
+    _priority(request)
+    
+    async def run() -> Dict[str, Any]:
+        context = await _load_context(request, model)
+        response = await _run_chat_item(request, model, context, request.client_id or request.session_id, "job")
+        return response.dict()
+    
+    try:
+        job = await job_store.submit(run)
+    except JobStoreFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return JobInfo(**job.to_dict())
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str, http_request: Request, wait: float = 0):
+    """
+    작업 상태/결과 조회 - wait(초)를 주면 작업이 끝날 때까지 최대 그만큼 기다린 뒤 응답 (롱폴링)
+    """
+    wait = min(max(wait, 0), settings.JOBS_MAX_WAIT)
+    try:
+        job = await _cancel_on_disconnect(http_request, job_store.wait(job_id, wait) if wait else job_store.get(job_id))
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겼습니다")
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업 ID {job_id}를 찾을 수 없습니다")
+    return JobInfo(**job)
+
+@router.delete("/jobs/{job_id}", response_model=JobInfo)
+async def cancel_job(job_id: str):
+    """
+    작업 취소 - 대기 중이면 실행하지 않고, 생성 중이면 다음 디코딩 스텝에서 멈춤
+    """
+    job = await job_store.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업 ID {job_id}를 찾을 수 없습니다")
+    return JobInfo(**job)
+
+@router.websocket("/ws/chat")
+async def ws_chat(websocket: WebSocket, session_id: Optional[str] = None, model: Optional[str] = None):
+    """
+    WebSocket 채팅 - 연결 동안 세션 하나를 고정해 턴마다 토큰을 프레임 단위로 전송
+    컨텍스트는 연결 시 한 번 읽어 메모리에 유지하고 (턴마다 get_context 없음) 새 메시지만 저장소에 추가,
+    모델의 세션 KV 캐시도 연결 동안 LRU 제거 대상에서 제외
+    
+    세션과 모델은 연결 시 쿼리(session_id, model)로 정함 (프레임의 session_id/model은 무시)
+    
+    클라이언트 -> 서버: {"type": "chat", "messages": [...], "parameters": {...}, ...} (ChatRequest 필드)
+                       {"type": "cancel"} (생성 중인 응답 취소)
+    서버 -> 클라이언트: session, token, done, cancelled, error 프레임
+    """
+    await websocket.accept()
+    session_id = session_id or str(uuid4())
+    chat_model = model_router.get_model(model or "default")
+    
+    context = await context_manager.get_context(session_id) or []
+    chat_model.pin_session(session_id)
+    turn: Optional[asyncio.Future] = None
+    try:
+        await websocket.send_json({"type": "session", "session_id": session_id, "model": chat_model.name})
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                await websocket.send_json({"type": "error", "status_code": 400, "detail": "JSON 객체 프레임이 아닙니다"})
+                continue
+            kind = frame.pop("type", "chat")
+            
+            if kind == "cancel":
+                if turn is not None and not turn.done():
+                    # 생성 중인 스레드는 다음 디코딩 스텝에서 멈춤
+                    turn.cancel()
+                    await asyncio.gather(turn, return_exceptions=True)
+                    await websocket.send_json({"type": "cancelled"})
+            elif kind == "chat":
+                if turn is not None and not turn.done():
+                    await websocket.send_json({
+                        "type": "error", "status_code": 409,
+                        "detail": "이전 응답을 생성 중입니다 (cancel로 취소할 수 있습니다)"
+                    })
+                    continue
+                # 생성 중에도 cancel 프레임을 받을 수 있도록 턴은 별도 태스크에서 실행
+                turn = asyncio.ensure_future(_ws_turn(websocket, frame, session_id, chat_model, context))
+            else:
+                await websocket.send_json({"type": "error", "status_code": 400, "detail": f"알 수 없는 프레임: {kind}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # 진행 중인 턴을 취소하고 턴에서 난 예외(연결 종료 후 전송 실패 등)도 여기서 회수
+        if turn is not None:
+            turn.cancel()
+            await asyncio.gather(turn, return_exceptions=True)
+        chat_model.unpin_session(session_id)
+
+async def _ws_turn(websocket: WebSocket, frame: Dict[str, Any], session_id: str, model, context: List[Dict[str, Any]]):
+    """WebSocket 채팅 한 턴 - 고정된 컨텍스트에 메시지를 추가하고 생성 토큰을 프레임으로 전송"""
+    start = time.perf_counter()
+    status = "499"  # 응답 완료 전에 취소되거나 연결이 끊긴 경우
+    ticket = None
+    try:
+        request = ChatRequest(**{**frame, "session_id": session_id})
+        parameters = request.parameters or {}
+        timeout_ms = request.timeout_ms or settings.GENERATION_TIMEOUT_MS
+        deadline = Deadline(timeout_ms / 1000) if timeout_ms > 0 else None
+        
+        ticket = await admission.acquire(
+            model.name,
+            flow=request.client_id or session_id,
+            priority=_priority(request),
+            cost=parameters.get("max_new_tokens", settings.MAX_NEW_TOKENS),
+            timeout=deadline.remaining() if deadline else None
+        )
+        
+        await _extend_context(session_id, context, [message.dict() for message in request.messages], model)
+        
+        chunks = []
+        async for text in model.stream(
+            context=fit_context_to_budget(list(context), model),
+            parameters=parameters,
+            session_id=session_id,
+            deadline=deadline
+        ):
+            chunks.append(text)
+            await websocket.send_json({"type": "token", "token": text})
+        
+        response = "".join(chunks)
+        if request.save_context and response:
+            await _extend_context(session_id, context, [{"role": "assistant", "content": response}], model)
+        status = "200"
+        await websocket.send_json({
+            "type": "done",
+            "session_id": session_id,
+            "response": response,
+            "model": model.name,
+            "truncated": bool(deadline and deadline.truncated)
+        })
+    except (asyncio.CancelledError, WebSocketDisconnect):
+        raise
+    except ValidationError as e:
+        status = "422"
+        await _ws_error(websocket, 422, str(e))
+    except HTTPException as e:
+        status = str(e.status_code)
+        await _ws_error(websocket, e.status_code, e.detail)
+    except AdmissionRejectedError as e:
+        status = str(e.status_code)
+        await _ws_error(websocket, e.status_code, str(e), retry_after=e.retry_after)
+    except ExecutorQueueFullError as e:
+        status = "503"
+        await _ws_error(websocket, 503, str(e), retry_after=1)
+    except Exception as e:
+        status = "500"
+        await _ws_error(websocket, 500, f"모델 추론 오류: {str(e)}")
+    finally:
+        if ticket is not None:
+            ticket.release()
+        REQUEST_LATENCY.labels(model.name, "ws", status).observe(time.perf_counter() - start)
+
+async def _ws_error(websocket: WebSocket, status_code: int, detail: str, retry_after: Optional[int] = None):
+    """오류 프레임 전송 (연결이 이미 끊겼으면 무시)"""
+    frame = {"type": "error", "status_code": status_code, "detail": detail}
+    if retry_after is not None:
+        frame["retry_after"] = retry_after
+    try:
+        await websocket.send_json(frame)
+    except Exception:
+        pass
 
 @router.get("/models", response_model=AvailableModelsResponse)
 async def list_models():
@@ -64,12 +565,27 @@ async def list_models():
     models = model_router.list_models()
     return AvailableModelsResponse(models=models)
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    응답 캐시 적중/실패 통계
+    """
+    return model_router.response_cache.stats()
+
+@router.get("/admission/stats")
+async def admission_stats():
+    """
+    모델별 처리 중/대기 요청 수와 승인 제어 한도
+    """
+    return admission.stats()
+
 @router.delete("/sessions/{session_id}")
 async def delete_session(session_id: str):
     """
     세션 및 관련 컨텍스트 삭제
     """
-    success = context_manager.delete_context(session_id)
+    success = await context_manager.delete_context(session_id)
+    model_router.release_session(session_id)
     if not success:
         raise HTTPException(status_code=404, detail=f"세션 ID {session_id}를 찾을 수 없습니다")
     return {"status": "success", "message": f"세션 {session_id}가 삭제되었습니다"}
\ No newline at end of file
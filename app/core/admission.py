@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_REJECTED, ADMISSION_WAIT, INFLIGHT_REQUESTS, QUEUE_DEPTH
+
+class AdmissionRejectedError(Exception):
+    """동시 처리 한도와 대기열이 가득 차 요청을 받을 수 없을 때 발생 (status_code: 429 또는 503)"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after  # Retry-After 헤더 값(초)
+
+class _Waiter:
+    """대기열 항목 - finish가 작은 순서로 슬롯을 받음"""
+
+    def __init__(self, future: asyncio.Future, flow: str, finish: float):
+        self.future = future
+        self.flow = flow
+        self.finish = finish
+
+class _ModelQueue:
+    """
+    모델 하나의 실행 중 요청 수와 가중 공정 대기열 (WFQ)
+    흐름(세션/클라이언트)마다 가상 종료 시각 = max(현재 가상 시각, 흐름의 이전 종료 시각) + 비용 / 가중치
+    를 매겨 가장 작은 요청부터 실행하므로, 한 흐름이 긴 요청을 쌓아도 다른 흐름의 짧은 요청이 앞설 수 있고
+    가중치가 높은 우선순위 클래스가 더 자주 실행되지만 낮은 클래스도 밀려나지 않음
+    """
+
+    def __init__(self, name: str, max_inflight: int, max_queue: int):
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.queued = 0  # 대기 중인 요청 수 (취소된 항목 제외)
+        self.heap: List[Tuple[float, int, _Waiter]] = []
+        self.flows: Dict[str, float] = {}  # 흐름별 마지막 가상 종료 시각
+        self.virtual_time = 0.0
+        self.sequence = itertools.count()  # 같은 종료 시각이면 먼저 온 순서
+        self.service_time = 1.0  # 요청 처리 시간 이동 평균(초), Retry-After 추정에 사용
+
+    def has_capacity(self) -> bool:
+        return self.max_inflight <= 0 or self.inflight < self.max_inflight
+
+    def retry_after(self) -> int:
+        """지금 대기열 끝에 선 요청이 처리되기까지 걸릴 예상 시간(초)"""
+        slots = self.max_inflight if self.max_inflight > 0 else 1
+        return max(1, math.ceil(self.service_time * (self.queued + 1) / slots))
+
+    def push(self, future: asyncio.Future, flow: str, cost: float, weight: float) -> _Waiter:
+        start = max(self.virtual_time, self.flows.get(flow, 0.0))
+        waiter = _Waiter(future, flow, start + cost / weight)
+        self.flows[flow] = waiter.finish
+        heapq.heappush(self.heap, (waiter.finish, next(self.sequence), waiter))
+        self.queued += 1
+        return waiter
+
+    def pop(self) -> Optional[_Waiter]:
+        """다음에 실행할 대기자 (취소된 항목은 건너뜀)"""
+        while self.heap:
+            _, _, waiter = heapq.heappop(self.heap)
+            if waiter.future.done():
+                continue
+            self.queued -= 1
+            self.virtual_time = max(self.virtual_time, waiter.finish)
+            self._forget_idle_flows()
+            return waiter
+        return None
+
+    def discard(self, waiter: _Waiter):
+        """취소/시간 초과된 대기자 - 힙에서는 pop할 때 건너뜀"""
+        self.queued -= 1
+        if not self.queued:
+            self.heap.clear()
+
+    def _forget_idle_flows(self):
+        """가상 시각이 지나간 흐름은 새로 온 것과 같으므로 정리"""
+        if len(self.flows) > 1024:
+            self.flows = {flow: finish for flow, finish in self.flows.items() if finish > self.virtual_time}
+
+    def report(self):
+        QUEUE_DEPTH.labels(self.name, "admission").set(self.queued)
+        INFLIGHT_REQUESTS.labels(self.name).set(self.inflight)
+
+class AdmissionTicket:
+    """허용된 요청의 실행 슬롯 - 응답이 끝나면 release() (여러 번 호출해도 한 번만 반납)"""
+
+    def __init__(self, controller: "AdmissionController", queue: _ModelQueue):
+        self.controller = controller
+        self.queue = queue
+        self.start = time.perf_counter()
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        queue = self.queue
+        queue.service_time = 0.8 * queue.service_time + 0.2 * (time.perf_counter() - self.start)
+        self.controller._release(queue)
+
+class AdmissionController:
+    """
+    승인 제어 - 모델별 동시 처리 요청 수(max_inflight)와 대기열 길이(max_queue) 제한
+    한도를 넘으면 우선순위 클래스 가중치와 흐름별 공정성에 따라 대기열에서 순서를 기다리고, 대기열도 가득 차면 바로 429,
+    대기 시간이 ADMISSION_QUEUE_TIMEOUT_MS를 넘으면 503으로 거절
+    """
+
+    def __init__(self):
+        self.queues: Dict[str, _ModelQueue] = {}
+        self.timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+
+    def limits(self, name: str) -> Tuple[int, int]:
+        """(max_inflight, max_queue), 0 이하의 max_inflight는 무제한, 음수 max_queue는 무제한"""
+        limits = settings.ADMISSION_LIMITS.get(name, {})
+        return (
+            limits.get("max_inflight", settings.ADMISSION_MAX_INFLIGHT),
+            limits.get("max_queue", settings.ADMISSION_MAX_QUEUE)
+        )
+
+    def _queue(self, name: str) -> _ModelQueue:
+        queue = self.queues.get(name)
+        if queue is None:
+            queue = _ModelQueue(name, *self.limits(name))
+            self.queues[name] = queue
+        return queue
+
+    def weight(self, priority: Optional[str]) -> float:
+        """우선순위 클래스 가중치, 알 수 없는 클래스면 KeyError"""
+        return settings.PRIORITY_WEIGHTS[priority or settings.DEFAULT_PRIORITY]
+
+    async def acquire(self, name: str, flow: str = "", priority: Optional[str] = None,
+                      cost: float = 1.0, timeout: Optional[float] = None) -> AdmissionTicket:
+        """
+        모델 name의 실행 슬롯 획득
+        flow: 공정성 단위 (세션 또는 클라이언트 ID), priority: 우선순위 클래스,
+        cost: 요청 비용 추정치 (생성할 최대 토큰 수 등), timeout: 요청 마감까지 남은 시간(초)
+        대기열이 가득 찼거나 대기 시간이 초과되면 AdmissionRejectedError 발생
+        """
+        queue = self._queue(name)
+        weight = self.weight(priority)
+        limit = self.timeout if self.timeout > 0 else None
+        if timeout is not None:
+            limit = timeout if limit is None else min(limit, timeout)
+        start = time.perf_counter()
+
+        # 앞선 대기자가 없을 때만 바로 실행 (새 요청이 대기열을 앞지르지 않도록)
+        if queue.has_capacity() and not queue.queued:
+            queue.inflight += 1
+            queue.report()
+            ADMISSION_WAIT.labels(name, "admitted").observe(0)
+            return AdmissionTicket(self, queue)
+
+        if queue.max_queue >= 0 and queue.queued >= queue.max_queue:
+            ADMISSION_REJECTED.labels(name, "queue_full").inc()
+            raise AdmissionRejectedError(
+                f"모델 {name}의 요청이 너무 많습니다 (처리 중 {queue.inflight}개, 대기 {queue.queued}개)",
+                status_code=429, retry_after=queue.retry_after()
+            )
+
+        waiter = queue.push(asyncio.get_running_loop().create_future(), flow, cost, weight)
+        queue.report()
+        try:
+            await asyncio.wait_for(waiter.future, limit)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 슬롯을 넘겨받은 직후 취소됨 - 다음 대기자에게 넘김
+                self._release(queue)
+            else:
+                queue.discard(waiter)
+                queue.report()
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_WAIT.labels(name, "timeout").observe(time.perf_counter() - start)
+                ADMISSION_REJECTED.labels(name, "timeout").inc()
+                raise AdmissionRejectedError(
+                    f"모델 {name}의 대기 시간이 초과되었습니다 ({limit:g}초)",
+                    status_code=503, retry_after=queue.retry_after()
+                ) from None
+            ADMISSION_WAIT.labels(name, "cancelled").observe(time.perf_counter() - start)
+            raise
+
+        ADMISSION_WAIT.labels(name, "admitted").observe(time.perf_counter() - start)
+        return AdmissionTicket(self, queue)
+
+    def _release(self, queue: _ModelQueue):
+        """슬롯 반납 - 대기자가 있으면 실행 중 수를 유지한 채 가상 종료 시각이 가장 이른 대기자에게 넘김"""
+        waiter = queue.pop()
+        if waiter is not None:
+            waiter.future.set_result(None)
+        else:
+            queue.inflight -= 1
+        queue.report()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """모델별 실행 중/대기 요청 수와 한도"""
+        return {
+            name: {
+                "inflight": queue.inflight,
+                "queued": queue.queued,
+                "flows": len({waiter.flow for _, _, waiter in queue.heap if not waiter.future.done()}),
+                "max_inflight": queue.max_inflight,
+                "max_queue": queue.max_queue
+            }
+            for name, queue in self.queues.items()
+        }
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.executor import InferenceExecutor, ExecutorQueueFullError
+from app.core.metrics import QUEUE_DEPTH
+
+class _PendingBatch:
+    """같은 생성 파라미터를 공유하는 대기 요청 묶음"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.payloads: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.created_at = time.monotonic()
+        self.expired = False  # 최대 대기 시간 경과 여부
+
+class BatchScheduler:
+    """
+    배치 스케줄러 - 같은 모델로 동시에 들어온 요청을 모아 한 번의 배치 generate로 실행
+    요청은 max_wait_ms 동안 또는 max_batch_size개가 찰 때까지 모이며,
+    실행기 워커가 모두 바쁜 동안에는 다음 배치를 계속 채움
+    """
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        run_batch: Callable[[List[Any], Dict[str, Any]], List[Any]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[int] = None
+    ):
+        self.executor = executor
+        self.run_batch = run_batch  # (payloads, params) -> results, 워커 스레드에서 실행
+        self.max_batch_size = max(1, max_batch_size or settings.BATCH_MAX_SIZE)
+        self.max_wait = (settings.BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.batches: Dict[str, _PendingBatch] = {}  # 파라미터 키 -> 대기 배치
+        self.active = 0  # 실행 중인 배치 수
+        self.pending = 0  # 아직 디스패치되지 않은 요청 수
+
+    @property
+    def max_pending(self) -> int:
+        """디스패치 대기 요청 한도 (실행기 대기열 한도를 요청 수로 환산)"""
+        if self.executor.max_queue < 0:
+            return -1
+        return (self.executor.max_workers + self.executor.max_queue) * self.max_batch_size
+
+    @staticmethod
+    def _params_key(params: Dict[str, Any]) -> str:
+        """파라미터가 같은 요청끼리만 배치로 묶음"""
+        return json.dumps(params, sort_keys=True, default=str)
+
+    async def submit(self, payload: Any, params: Dict[str, Any]) -> Any:
+        """요청을 배치 대기열에 넣고 결과를 기다림"""
+        if self.max_pending >= 0 and self.pending >= self.max_pending:
+            raise ExecutorQueueFullError(
+                f"모델 {self.executor.name}의 배치 대기열이 가득 찼습니다 ({self.pending}개 대기 중)"
+            )
+
+        loop = asyncio.get_running_loop()
+        key = self._params_key(params)
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = _PendingBatch(params)
+            # 최대 대기 시간이 지나면 채워진 만큼 디스패치
+            loop.call_later(self.max_wait, self._expire, batch)
+
+        future = loop.create_future()
+        batch.payloads.append(payload)
+        batch.futures.append(future)
+        self.pending += 1
+        QUEUE_DEPTH.labels(self.executor.name, "batch").set(self.pending)
+
+        self._dispatch_ready()
+        return await future
+
+    def _expire(self, batch: _PendingBatch):
+        batch.expired = True
+        self._dispatch_ready()
+
+    def _dispatch_ready(self):
+        """준비된 배치(가득 찼거나 대기 시간 초과)를 빈 워커 수만큼 디스패치"""
+        ready = [
+            key for key, batch in self.batches.items()
+            if batch.expired or len(batch.payloads) >= self.max_batch_size
+        ]
+        # 오래 기다린 배치부터 처리
+        ready.sort(key=lambda key: self.batches[key].created_at)
+
+        for key in ready:
+            if self.active >= self.executor.max_workers:
+                break
+            batch = self.batches.pop(key)
+            # max_batch_size를 넘는 요청은 다음 배치로 넘김
+            if len(batch.payloads) > self.max_batch_size:
+                rest = _PendingBatch(batch.params)
+                rest.created_at = batch.created_at
+                rest.expired = True
+                rest.payloads = batch.payloads[self.max_batch_size:]
+                rest.futures = batch.futures[self.max_batch_size:]
+                batch.payloads = batch.payloads[:self.max_batch_size]
+                batch.futures = batch.futures[:self.max_batch_size]
+                self.batches[key] = rest
+            self.pending -= len(batch.payloads)
+            QUEUE_DEPTH.labels(self.executor.name, "batch").set(self.pending)
+            # 이미 취소된 요청은 제외
+            live = [(p, f) for p, f in zip(batch.payloads, batch.futures) if not f.done()]
+            if not live:
+                continue
+            batch.payloads = [p for p, _ in live]
+            batch.futures = [f for _, f in live]
+            self.active += 1
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _PendingBatch):
+        """배치 실행 후 결과를 각 요청으로 분배"""
+        try:
+            results = await self.executor.submit(self.run_batch, batch.payloads, batch.params)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future, result in zip(batch.futures, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.active -= 1
+            self._dispatch_ready()
@@ -16,10 +16,30 @@ class Settings(BaseSettings):
     # API 설정
     API_PREFIX: str = "/api"
     
+    # 프리포크 서버 설정 (python -m app.serve) - 마스터가 PRELOAD_MODELS 가중치를 로드한 뒤 워커를 fork
+    SERVE_WORKERS: int = 2  # 워커 프로세스 수
+    SERVE_SHARE_WEIGHTS: bool = True  # False면 워커마다 따로 로드 (uvicorn --workers와 같음)
+    
     # 모델 설정
     DEEPSEEK_MODEL_PATH: str = os.getenv("DEEPSEEK_MODEL_PATH", "./models/deepseek")
     LLAMA_MODEL_PATH: str = os.getenv("LLAMA_MODEL_PATH", "./models/llama")
     
+    # 모델 백엔드 - hf: 실제 체크포인트, fake: 지연만 흉내 내는 가짜 모델 (부하 테스트/벤치마크용)
+    MODEL_BACKEND: str = os.getenv("MODEL_BACKEND", "hf")
+    FAKE_PREFILL_MS: float = 20.0  # 프롬프트 처리 고정 지연(ms)
+    FAKE_PREFILL_MS_PER_TOKEN: float = 0.05  # 프롬프트 토큰당 추가 지연(ms)
+    FAKE_TOKEN_MS: float = 5.0  # 생성 토큰당 지연(ms)
+    FAKE_OUTPUT_TOKENS: int = 32  # 생성 토큰 수 (max_new_tokens가 더 작으면 그 값 사용)
+    
+    # 모델 워커 프로세스 - process면 모델마다 전용 프로세스에서 추론 (웹 프로세스와 GIL 경합 방지)
+    MODEL_WORKER_MODE: str = os.getenv("MODEL_WORKER_MODE", "inline")  # inline, process
+    MODEL_WORKER_CONCURRENCY: int = 8  # 워커당 동시 요청 수 (워커 안에서 배치로 묶일 수 있도록 BATCH_MAX_SIZE 정도)
+    MODEL_WORKER_RESTART_BACKOFF: float = 1.0  # 비정상 종료 후 재시작 대기(초), 연속 종료 시 두 배씩 증가 (최대 30초)
+    
+    # 모델 메모리 관리 - 새 모델을 로드할 때 예산을 넘으면 가장 오래 사용하지 않은 유휴 모델을 언로드
+    MODEL_MEMORY_BUDGET: int = 0  # 상주 모델 메모리 한도(바이트), 0이면 무제한
+    MODEL_MEMORY_SIZES: Dict[str, int] = {}  # 모델별 메모리 사용량 재정의(바이트), 없으면 측정값/체크포인트 크기 사용
+    
     # 모델 라우팅 설정 - 특정 태스크에 따라 다른 모델 사용
     MODEL_ROUTING: Dict[str, str] = {
         "default": "deepseek",  # 기본 모델
@@ -30,12 +50,82 @@ class Settings(BaseSettings):
     # 컨텍스트 관리 설정
     CONTEXT_STORAGE: str = os.getenv("CONTEXT_STORAGE", "memory")  # memory, redis, sqlite
     CONTEXT_TTL: int = 3600  # 컨텍스트 유지 시간(초)
+    CONTEXT_SWEEP_INTERVAL: int = 60  # 만료 컨텍스트 정리 주기(초)
+    
+    # Redis 컨텍스트 스토리지 설정
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
+    REDIS_POOL_SIZE: int = 32  # 커넥션 풀 최대 연결 수
+    
+    # SQLite 컨텍스트 스토리지 설정
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "contexts.db")
+    SQLITE_POOL_SIZE: int = 4  # 읽기 연결(스레드) 수
+    SQLITE_COMMIT_INTERVAL_MS: int = 5  # 그룹 커밋 주기(ms)
+    
+    # 시작 시 모델 로드 설정
+    PRELOAD_MODELS: List[str] = []  # 시작 시 로드할 모델 이름 또는 라우팅 키 (예: ["deepseek", "llama"])
+    PRELOAD_PARALLEL: bool = True  # 여러 모델을 동시에 로드
+    WARMUP_ENABLED: bool = True  # 로드 후 짧은 생성으로 워밍업
+    WARMUP_PROMPT: str = "Hello"
+    WARMUP_MAX_NEW_TOKENS: int = 4
     
     # 모델 추론 설정
     MAX_NEW_TOKENS: int = 2048
+    GENERATION_TIMEOUT_MS: int = 0  # 요청 마감 기본값(ms), 승인 대기 포함, 넘으면 잘린 응답 반환 (0이면 무제한)
     TEMPERATURE: float = 0.7
     TOP_P: float = 0.95
     
+    # 프롬프트 토큰 예산 - 시스템 프롬프트 + 최근 메시지만 남김 (0이면 자르지 않음)
+    CONTEXT_TOKEN_BUDGET: int = 3072
+    CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {}  # 모델별 예산 재정의 (예: {"deepseek": 12288})
+    
+    # 추론 실행기 설정 - 모델별 전용 스레드 풀
+    INFERENCE_MAX_WORKERS: int = 1  # 모델당 동시 생성 수
+    INFERENCE_MAX_QUEUE: int = 32  # 모델당 최대 대기 작업 수 (음수면 무제한)
+    INFERENCE_WORKERS: Dict[str, int] = {}  # 모델별 워커 수 재정의 (예: {"llama": 2})
+    
+    # 승인 제어 - 모델별 동시 처리 요청 수와 대기열 제한 (가득 차면 429/503 + Retry-After)
+    ADMISSION_MAX_INFLIGHT: int = 16  # 모델당 동시 처리 요청 수 (0이면 무제한)
+    ADMISSION_MAX_QUEUE: int = 64  # 모델당 최대 대기 요청 수, 넘으면 429 (음수면 무제한)
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 30000  # 대기열 최대 대기 시간(ms), 넘으면 503 (0이면 무제한)
+    ADMISSION_LIMITS: Dict[str, Dict[str, int]] = {}  # 모델별 재정의 (예: {"llama": {"max_inflight": 4, "max_queue": 16}})
+    # 대기열 순서 - 세션/클라이언트별 가중 공정 큐, 비용은 max_new_tokens, 가중치가 클수록 먼저 실행
+    PRIORITY_WEIGHTS: Dict[str, float] = {"interactive": 8.0, "normal": 2.0, "batch": 1.0}
+    DEFAULT_PRIORITY: str = "normal"  # priority를 지정하지 않은 요청의 클래스
+    
+    # 배치 채팅 (/api/chat/batch) - 모델별로 묶어 프롬프트 길이순으로 실행
+    CHAT_BATCH_MAX_REQUESTS: int = 10000  # 한 번에 받을 최대 요청 수
+    CHAT_BATCH_CONCURRENCY: int = 0  # 모델당 동시 실행 요청 수 (0이면 BATCH_MAX_SIZE x 추론 워커 수)
+    CHAT_BATCH_PRIORITY: str = "batch"  # priority를 지정하지 않은 항목의 우선순위 클래스
+    
+    # 비동기 작업 (/api/jobs) - 생성 요청을 백그라운드에서 실행하고 폴링/롱폴링으로 결과 조회
+    JOBS_MAX_ENTRIES: int = 1000  # 메모리에 보관할 최대 작업 수 (넘으면 오래된 끝난 작업부터 제거)
+    JOBS_MAX_PENDING: int = 256  # 대기 + 실행 중인 작업 한도, 넘으면 429 (음수면 무제한)
+    JOBS_CONCURRENCY: int = 8  # 동시에 실행하는 작업 수 (나머지는 queued)
+    JOBS_RESULT_TTL: int = 3600  # 끝난 작업 보관 시간(초)
+    JOBS_MAX_WAIT: float = 60.0  # 롱폴링(GET ?wait=) 최대 대기 시간(초)
+    JOBS_PERSIST: bool = False  # True면 SQLITE_PATH의 jobs 테이블에도 저장 (메모리 제거 후/다른 워커에서도 조회)
+    
+    # 클라이언트 연결 종료 확인 주기(ms) - 끊기면 진행 중인 생성을 다음 디코딩 스텝에서 멈춤
+    DISCONNECT_POLL_MS: int = 50
+    
+    # 동적 배치 설정 - 동시 요청을 모아 한 번의 generate로 실행
+    BATCH_MAX_SIZE: int = 8  # 배치당 최대 요청 수 (1이면 배치 비활성화)
+    BATCH_MAX_WAIT_MS: int = 10  # 배치를 채우기 위해 기다리는 최대 시간(ms)
+    
+    # 응답 캐시 설정 - 결정적 생성(do_sample=False, temperature=0) 결과 재사용
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 ** 2  # 메모리 계층 한도(바이트)
+    RESPONSE_CACHE_REDIS: bool = False  # Redis 계층 사용 여부 (REDIS_* 설정 사용)
+    RESPONSE_CACHE_TTL: int = 86400  # Redis 계층 유지 시간(초)
+    
+    # 세션 KV 캐시 설정 - 대화 턴 사이 prefill 재사용
+    KV_CACHE_ENABLED: bool = True
+    KV_CACHE_MAX_SESSIONS: int = 32  # 모델당 캐시할 최대 세션 수
+    KV_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # 모델당 KV 캐시 메모리 한도(바이트)
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
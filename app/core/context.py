@@ -1,11 +1,24 @@
+import asyncio
+import functools
+import heapq
+import json
 import time
 from typing import Dict, List, Optional, Any
 from app.core.config import settings
+from app.core.metrics import CONTEXT_LATENCY, observe
+
+def _timed(method):
+    """스토리지 작업 시간을 작업/백엔드별 히스토그램에 기록"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with observe(CONTEXT_LATENCY, method.__name__, self.storage_type):
+            return await method(self, *args, **kwargs)
+    return wrapper
 
 class ContextManager:
     """컨텍스트 관리자 - 세션별 대화 컨텍스트 관리"""
     
-    def __init__(self):
+    def __init__(self, redis_client: Any = None):
         self.storage_type = settings.CONTEXT_STORAGE
         self.ttl = settings.CONTEXT_TTL
         
@@ -13,139 +26,216 @@ class ContextManager:
         if self.storage_type == "memory":
             self.contexts = {}  # 메모리 내 스토리지
             self.timestamps = {}  # 마지막 액세스 타임스탬프
+            self.expiry_heap = []  # (만료 예정 시각, 세션 ID) 최소 힙
+            self.expiry_index = {}  # 세션 ID -> 힙에 등록된 만료 예정 시각
         elif self.storage_type == "redis":
-            # Redis 사용 시 초기화 (필요한 경우 구현)
-            import redis
-            self.redis = redis.Redis(host='localhost', port=6379, db=0)
+            # asyncio Redis 클라이언트 - 공유 커넥션 풀 사용 (테스트 시 fakeredis 등 주입 가능)
+            if redis_client is None:
+                import redis.asyncio as aioredis
+                pool = aioredis.ConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                    password=settings.REDIS_PASSWORD,
+                    max_connections=settings.REDIS_POOL_SIZE
+                )
+                redis_client = aioredis.Redis(connection_pool=pool)
+            self.redis = redis_client
         elif self.storage_type == "sqlite":
-            # SQLite 사용 시 초기화 (필요한 경우 구현)
-            import sqlite3
-            self.conn = sqlite3.connect('contexts.db')
-            self._init_db()
-    
-    def _init_db(self):
-        """SQLite DB 초기화 (필요한 경우)"""
-        if self.storage_type == "sqlite":
-            cursor = self.conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contexts (
-                session_id TEXT PRIMARY KEY,
-                context TEXT,
-                timestamp INTEGER
-            )
-            ''')
-            self.conn.commit()
+            # WAL + 스레드별 연결 + 그룹 커밋 스토리지
+            from app.core.sqlite_store import SQLiteContextStore
+            self.store = SQLiteContextStore(settings.SQLITE_PATH)
     
-    def get_context(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
-        """세션 ID로 컨텍스트 검색"""
-        self._clean_expired()  # 만료된 컨텍스트 정리
-        
+    @_timed
+    async def get_context(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """세션 ID로 컨텍스트 검색 (만료 정리는 백그라운드 스위퍼가 담당)"""
         if self.storage_type == "memory":
             if session_id in self.contexts:
-                self.timestamps[session_id] = time.time()
-                return self.contexts[session_id]
+                now = time.time()
+                # 스위퍼가 아직 정리하지 않은 만료 세션
+                if now - self.timestamps[session_id] > self.ttl:
+                    await self.delete_context(session_id)
+                    return None
+                self.timestamps[session_id] = now
+                # 호출자가 수정해도 저장된 로그가 바뀌지 않도록 복사본 반환
+                return list(self.contexts[session_id])
             return None
         
         elif self.storage_type == "redis":
-            # Redis 구현 (필요시)
-            context_json = self.redis.get(f"context:{session_id}")
-            if context_json:
-                import json
-                self.redis.expire(f"context:{session_id}", self.ttl)
-                return json.loads(context_json)
-            return None
+            # 메시지 리스트 조회와 TTL 갱신을 파이프라인으로 한 번에 처리
+            key = self._redis_key(session_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.lrange(key, 0, -1)
+                pipe.expire(key, self.ttl)
+                messages, _ = await pipe.execute()
+            if messages:
+                return [json.loads(message) for message in messages]
+            return await self._migrate_redis_context(session_id)
         
         elif self.storage_type == "sqlite":
-            # SQLite 구현 (필요시)
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT context FROM contexts WHERE session_id = ?", 
-                (session_id,)
-            )
-            result = cursor.fetchone()
-            if result:
-                import json
-                cursor.execute(
-                    "UPDATE contexts SET timestamp = ? WHERE session_id = ?",
-                    (int(time.time()), session_id)
-                )
-                self.conn.commit()
-                return json.loads(result[0])
-            return None
+            return await self.store.get_messages(session_id, int(time.time() - self.ttl))
     
-    def update_context(self, session_id: str, context: List[Dict[str, Any]]) -> bool:
-        """컨텍스트 업데이트 또는 생성"""
+    @_timed
+    async def update_context(self, session_id: str, context: List[Dict[str, Any]]) -> bool:
+        """
+        컨텍스트 전체 교체 또는 생성
+        대화 턴마다 메시지를 추가할 때는 append_messages 사용
+        """
         if self.storage_type == "memory":
-            self.contexts[session_id] = context
-            self.timestamps[session_id] = time.time()
+            self.contexts[session_id] = list(context)
+            self._touch_memory(session_id)
             return True
         
         elif self.storage_type == "redis":
-            # Redis 구현 (필요시)
-            import json
-            self.redis.setex(
-                f"context:{session_id}", 
-                self.ttl,
-                json.dumps(context)
-            )
+            key = self._redis_key(session_id)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key, self._legacy_redis_key(session_id))
+                if context:
+                    pipe.rpush(key, *[json.dumps(message) for message in context])
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
             return True
         
         elif self.storage_type == "sqlite":
-            # SQLite 구현 (필요시)
-            import json
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "INSERT OR REPLACE INTO contexts VALUES (?, ?, ?)",
-                (session_id, json.dumps(context), int(time.time()))
-            )
-            self.conn.commit()
+            return await self.store.replace_messages(session_id, context)
+    
+    @_timed
+    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        세션 메시지 로그 끝에 새 메시지만 추가 (없으면 세션 생성)
+        기록량이 전체 대화 길이가 아니라 새 메시지 크기에 비례
+        """
+        if self.storage_type == "memory":
+            self.contexts.setdefault(session_id, []).extend(messages)
+            self._touch_memory(session_id)
+            return True
+        
+        elif self.storage_type == "redis":
+            key = self._redis_key(session_id)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if messages:
+                    pipe.rpush(key, *[json.dumps(message) for message in messages])
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
             return True
+        
+        elif self.storage_type == "sqlite":
+            return await self.store.append_messages(session_id, messages)
     
-    def delete_context(self, session_id: str) -> bool:
+    @_timed
+    async def delete_context(self, session_id: str) -> bool:
         """컨텍스트 삭제"""
         if self.storage_type == "memory":
             if session_id in self.contexts:
                 del self.contexts[session_id]
                 del self.timestamps[session_id]
+                # 힙에 남은 항목은 스위퍼가 꺼낼 때 무시됨
+                self.expiry_index.pop(session_id, None)
                 return True
             return False
         
         elif self.storage_type == "redis":
-            # Redis 구현 (필요시)
-            return bool(self.redis.delete(f"context:{session_id}"))
+            return bool(await self.redis.delete(self._redis_key(session_id), self._legacy_redis_key(session_id)))
         
         elif self.storage_type == "sqlite":
-            # SQLite 구현 (필요시)
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "DELETE FROM contexts WHERE session_id = ?", 
-                (session_id,)
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            return await self.store.delete_session(session_id)
+    
+    def _redis_key(self, session_id: str) -> str:
+        """세션 메시지 리스트 키"""
+        return f"messages:{session_id}"
+    
+    def _legacy_redis_key(self, session_id: str) -> str:
+        """메시지 리스트 도입 이전의 컨텍스트 JSON 문자열 키"""
+        return f"context:{session_id}"
+    
+    async def _migrate_redis_context(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        메시지 리스트 도입 이전에 저장된 세션을 읽어 리스트 키로 옮김 (없으면 None)
+        그 사이 추가된 메시지보다 앞에 오도록 LPUSH로 앞쪽에 넣고 이전 키는 삭제
+        """
+        legacy_key = self._legacy_redis_key(session_id)
+        data = await self.redis.get(legacy_key)
+        if not data:
+            return None
+        context = json.loads(data)
+        key = self._redis_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if context:
+                pipe.lpush(key, *[json.dumps(message) for message in reversed(context)])
+                pipe.expire(key, self.ttl)
+            pipe.delete(legacy_key)
+            await pipe.execute()
+        return context or None
     
-    def _clean_expired(self):
-        """만료된 컨텍스트 정리"""
+    def _touch_memory(self, session_id: str):
+        """메모리 모드 접근 시각 갱신"""
+        now = time.time()
+        self.timestamps[session_id] = now
+        # 만료 인덱스에는 새 세션만 등록 (접근 시각 갱신은 스위퍼가 꺼낼 때 반영)
+        if session_id not in self.expiry_index:
+            self._schedule_expiry(session_id, now + self.ttl)
+    
+    def _schedule_expiry(self, session_id: str, expires_at: float):
+        """만료 인덱스(최소 힙)에 세션 등록"""
+        self.expiry_index[session_id] = expires_at
+        heapq.heappush(self.expiry_heap, (expires_at, session_id))
+    
+    async def _clean_expired(self, limit: Optional[int] = None) -> int:
+        """
+        만료된 컨텍스트 정리
+        메모리 모드는 만료 예정 시각이 지난 힙 항목만 확인하므로 전체 세션을 순회하지 않음
+        반환값: 확인한 힙 항목 수 (limit에 도달했으면 남은 항목이 더 있을 수 있음)
+        """
         now = time.time()
         
         if self.storage_type == "memory":
-            expired = [
-                sid for sid, ts in self.timestamps.items() 
-                if now - ts > self.ttl
-            ]
-            for sid in expired:
-                del self.contexts[sid]
-                del self.timestamps[sid]
+            processed = 0
+            while self.expiry_heap and self.expiry_heap[0][0] <= now:
+                if limit is not None and processed >= limit:
+                    break
+                expires_at, sid = heapq.heappop(self.expiry_heap)
+                processed += 1
+                
+                # 삭제되었거나 다시 등록된 세션의 오래된 힙 항목
+                if self.expiry_index.get(sid) != expires_at:
+                    continue
+                
+                actual = self.timestamps[sid] + self.ttl
+                if actual <= now:
+                    del self.contexts[sid]
+                    del self.timestamps[sid]
+                    del self.expiry_index[sid]
+                else:
+                    # 그 사이 접근된 세션은 실제 만료 시각으로 다시 등록
+                    self._schedule_expiry(sid, actual)
+            return processed
         
         elif self.storage_type == "redis":
             # Redis는 자동으로 만료됨
-            pass
+            return 0
         
         elif self.storage_type == "sqlite":
-            # SQLite 구현 (필요시)
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "DELETE FROM contexts WHERE timestamp < ?", 
-                (int(now - self.ttl),)
-            )
-            self.conn.commit()
\ No newline at end of file
+            # timestamp 인덱스로 만료 세션 삭제
+            return await self.store.delete_expired(int(now - self.ttl))
+    
+    async def run_sweeper(self, interval: Optional[float] = None, batch_size: int = 1000):
+        """
+        백그라운드 만료 정리 루프 - 앱 시작 시 태스크로 실행
+        한 번에 batch_size개씩 정리하고 이벤트 루프에 양보하여 요청 처리를 막지 않음
+        """
+        interval = interval or settings.CONTEXT_SWEEP_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                while await self._clean_expired(limit=batch_size) >= batch_size:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                print(f"컨텍스트 만료 정리 오류: {e}")
+    
+    async def close(self):
+        """스토리지 연결 종료"""
+        if self.storage_type == "redis":
+            close = getattr(self.redis, "aclose", None) or self.redis.close
+            await close()
+        elif self.storage_type == "sqlite":
+            await self.store.close()
\ No newline at end of file
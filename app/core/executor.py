@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+
+class ExecutorQueueFullError(Exception):
+    """추론 대기열이 가득 차서 작업을 받을 수 없을 때 발생"""
+    pass
+
+# fork 후 자식 프로세스에서 초기화할 실행기 목록
+_executors: "weakref.WeakSet[InferenceExecutor]" = weakref.WeakSet()
+
+class InferenceExecutor:
+    """
+    추론 실행기 - 모델별 전용 스레드 풀에서 블로킹 추론 작업 실행
+    토큰화/생성/디코딩을 워커 스레드로 넘겨 이벤트 루프가 다른 요청을 계속 처리하도록 함
+    """
+
+    def __init__(self, name: str, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers or settings.INFERENCE_WORKERS.get(
+            name, settings.INFERENCE_MAX_WORKERS
+        )
+        self.max_queue = settings.INFERENCE_MAX_QUEUE if max_queue is None else max_queue
+        self.pending = 0  # 실행 중 + 대기 중인 작업 수
+        self._pool = None
+        self._lock = threading.Lock()
+        _executors.add(self)
+
+    @property
+    def running(self) -> int:
+        """현재 실행 중인 작업 수"""
+        return min(self.pending, self.max_workers)
+
+    @property
+    def queued(self) -> int:
+        """워커를 기다리는 작업 수"""
+        return max(0, self.pending - self.max_workers)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """스레드 풀 지연 생성"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"inference-{self.name}"
+            )
+        return self._pool
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        블로킹 함수를 워커 스레드에서 실행하고 결과를 기다림
+        대기열 한도(max_queue)를 넘으면 ExecutorQueueFullError 발생
+        """
+        with self._lock:
+            if self.max_queue >= 0 and self.pending >= self.max_workers + self.max_queue:
+                raise ExecutorQueueFullError(
+                    f"모델 {self.name}의 추론 대기열이 가득 찼습니다 ({self.pending}개 처리 중)"
+                )
+            self.pending += 1
+            self._report()
+
+        try:
+            future = self._get_pool().submit(partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+
+        # 호출자가 취소되어도 스레드 작업이 끝날 때까지 슬롯을 점유한 것으로 계산
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+            self._report()
+
+    def _report(self):
+        QUEUE_DEPTH.labels(self.name, "executor").set(self.queued)
+
+    def _reset_after_fork(self):
+        """fork된 자식에는 부모의 워커 스레드가 없으므로 풀과 카운터를 새로 시작"""
+        self._pool = None
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def shutdown(self, wait: bool = False):
+        """스레드 풀 종료"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+def _reset_executors_after_fork():
+    for executor in list(_executors):
+        executor._reset_after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executors_after_fork)
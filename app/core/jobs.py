@@ -0,0 +1,205 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+# 더 이상 바뀌지 않는 작업 상태
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+class JobStoreFullError(Exception):
+    """대기/실행 중인 작업이 한도에 도달해 새 작업을 받을 수 없을 때 발생"""
+    pass
+
+class Job:
+    """비동기 생성 작업 하나의 상태와 결과"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "queued"  # queued, running, succeeded, failed, cancelled
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.status_code: Optional[int] = None
+        self.detail: Optional[str] = None
+        self.done = asyncio.Event()
+        self.task: Optional[asyncio.Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "status_code": self.status_code,
+            "detail": self.detail
+        }
+
+class JobStore:
+    """
+    비동기 작업 저장소 - 생성 요청을 작업으로 받아 백그라운드에서 실행하고 상태/결과 보관
+    - 메모리에는 최대 JOBS_MAX_ENTRIES개 (넘으면 오래된 끝난 작업부터 제거)
+    - 동시에 JOBS_CONCURRENCY개만 실행하고 나머지는 queued 상태로 대기
+    - JOBS_PERSIST면 SQLite(SQLITE_PATH)의 jobs 테이블에도 저장해
+      메모리에서 제거된 뒤나 다른 워커 프로세스에서도 조회 가능
+    """
+
+    def __init__(self, store: Any = None):
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.max_entries = settings.JOBS_MAX_ENTRIES
+        self.max_pending = settings.JOBS_MAX_PENDING
+        self.ttl = settings.JOBS_RESULT_TTL
+        self.pending = 0  # 대기 + 실행 중인 작업 수
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # 컨텍스트 스토리지가 SQLite면 같은 스토어(같은 DB 파일과 쓰기 스레드)를 사용
+        self._owns_store = False
+        if settings.JOBS_PERSIST and store is None:
+            from app.core.sqlite_store import SQLiteContextStore
+            store = SQLiteContextStore(settings.SQLITE_PATH)
+            self._owns_store = True
+        self.store = store if settings.JOBS_PERSIST else None
+
+    async def submit(self, run: Callable[[], Awaitable[Dict[str, Any]]]) -> Job:
+        """
+        작업 등록 후 바로 반환 (run은 백그라운드에서 실행되어 결과 dict를 반환)
+        run이 status_code/detail 속성이 있는 예외(HTTPException 등)를 던지면 그대로 기록
+        """
+        if self.max_pending >= 0 and self.pending >= self.max_pending:
+            raise JobStoreFullError(f"처리 중인 작업이 너무 많습니다 ({self.pending}개)")
+
+        job = Job(uuid4().hex)
+        self.jobs[job.job_id] = job
+        self.pending += 1
+        self._evict()
+        await self._save(job)
+        job.task = asyncio.ensure_future(self._run(job, run))
+        return job
+
+    async def _run(self, job: Job, run: Callable[[], Awaitable[Dict[str, Any]]]):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.JOBS_CONCURRENCY)
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                await self._save(job)
+                job.result = await run()
+            job.status = "succeeded"
+            job.status_code = 200
+        except asyncio.CancelledError:
+            self._cancelled(job)
+        except Exception as e:
+            job.status = "failed"
+            job.status_code = getattr(e, "status_code", 500)
+            job.detail = getattr(e, "detail", None) or str(e)
+        finally:
+            self._finish(job)
+        await self._save(job)
+
+    def _cancelled(self, job: Job):
+        job.status = "cancelled"
+        job.detail = "작업이 취소되었습니다"
+
+    def _finish(self, job: Job):
+        job.finished_at = time.time()
+        self.pending -= 1
+        job.done.set()
+
+    async def _save(self, job: Job):
+        if self.store is None:
+            return
+        try:
+            await self.store.save_job(job.job_id, job.to_dict())
+        except Exception as e:
+            print(f"작업 {job.job_id} 저장 오류: {e}")
+
+    def _evict(self):
+        """메모리 한도를 넘으면 오래된 끝난 작업부터 제거 (실행 중인 작업은 남김)"""
+        if len(self.jobs) <= self.max_entries:
+            return
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished]:
+            del self.jobs[job_id]
+            if len(self.jobs) <= self.max_entries:
+                break
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태 조회 (메모리 -> SQLite 순서)"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return await self.store.get_job(job_id)
+        return None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """작업이 끝나거나 timeout(초)이 지날 때까지 기다린 뒤 상태 반환 (롱폴링)"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return job.to_dict()
+
+        # 다른 워커 프로세스의 작업은 SQLite를 주기적으로 확인
+        deadline = time.monotonic() + timeout
+        while True:
+            data = await self.get(job_id)
+            if data is None or data["status"] in FINISHED_STATUSES or time.monotonic() >= deadline:
+                return data
+            await asyncio.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        이 프로세스에서 실행 중인 작업 취소 (진행 중인 생성도 멈춤), 없으면 None
+        작업이 끝나고 취소 상태가 저장된 뒤 반환
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.finished and job.task is not None:
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+            if not job.finished:
+                # 한 번도 실행되지 않고 취소된 태스크는 _run의 정리 코드를 거치지 않음
+                self._cancelled(job)
+                self._finish(job)
+                await self._save(job)
+        return job.to_dict()
+
+    async def run_sweeper(self, interval: Optional[float] = None):
+        """보관 시간(JOBS_RESULT_TTL)이 지난 끝난 작업 정리 - 앱 시작 시 태스크로 실행"""
+        interval = interval or settings.CONTEXT_SWEEP_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                cutoff = time.time() - self.ttl
+                for job_id in [
+                    job_id for job_id, job in self.jobs.items()
+                    if job.finished and job.finished_at < cutoff
+                ]:
+                    del self.jobs[job_id]
+                if self.store is not None:
+                    await self.store.delete_jobs_before(int(cutoff))
+            except Exception as e:
+                print(f"작업 정리 오류: {e}")
+
+    async def close(self):
+        """남은 작업 취소 후 (직접 연 경우) SQLite 스토어 종료"""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._owns_store:
+            await self.store.close()
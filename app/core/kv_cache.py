@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+def _cache_nbytes(past_key_values: Any) -> int:
+    """KV 캐시가 차지하는 텐서 메모리(바이트) 계산"""
+    tensors = []
+    if hasattr(past_key_values, "layers"):  # transformers 최신 Cache 구조
+        for layer in past_key_values.layers:
+            tensors.extend(t for t in (getattr(layer, "keys", None), getattr(layer, "values", None)) if t is not None)
+    elif hasattr(past_key_values, "key_cache"):  # DynamicCache
+        tensors.extend(past_key_values.key_cache)
+        tensors.extend(past_key_values.value_cache)
+    else:  # 레거시 튜플 형식
+        for layer in past_key_values:
+            tensors.extend(layer)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+def _cache_length(past_key_values: Any) -> int:
+    """KV 캐시에 들어 있는 토큰 수"""
+    if hasattr(past_key_values, "get_seq_length"):
+        return past_key_values.get_seq_length()
+    return past_key_values[0][0].shape[-2]
+
+class _KVCacheEntry:
+    def __init__(self, token_ids, past_key_values: Any, nbytes: int):
+        self.token_ids = token_ids  # 캐시가 담고 있는 토큰 (1차원 CPU 텐서)
+        self.prefix_hash = hash(tuple(token_ids.tolist()))
+        self.past_key_values = past_key_values
+        self.nbytes = nbytes
+
+class KVCacheStore:
+    """
+    세션별 KV 캐시 저장소 - 대화 턴 사이에 past_key_values를 재사용
+    새 프롬프트가 캐시된 토큰과 앞부분이 같으면 그 부분의 prefill을 건너뛰고,
+    세션 수/메모리 한도를 넘으면 가장 오래 사용하지 않은 세션부터 제거 (LRU)
+    고정(pin)된 세션은 세션 수 한도로는 제거하지 않고, 메모리 한도를 넘을 때만 마지막으로 제거
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.enabled = settings.KV_CACHE_ENABLED
+        self.max_sessions = settings.KV_CACHE_MAX_SESSIONS if max_sessions is None else max_sessions
+        self.max_bytes = settings.KV_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.entries: "OrderedDict[str, _KVCacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+        self.pinned: Dict[str, int] = {}  # 세션 ID -> 고정 횟수 (WebSocket 연결 등)
+        self._lock = threading.Lock()  # 워커 스레드에서 접근
+
+    def take(self, session_id: str, input_ids) -> Optional[Any]:
+        """
+        입력 토큰과 앞부분이 일치하는 세션 캐시를 꺼내 반환
+        생성이 끝나 store()로 돌려놓을 때까지 캐시는 호출자가 독점 (동시 요청이 같은 캐시를 변경하지 않도록)
+        """
+        with self._lock:
+            entry = self.entries.pop(session_id, None)
+            if entry is not None:
+                self.total_bytes -= entry.nbytes
+
+        reuse = self._match_length(entry, input_ids) if entry is not None else 0
+        if reuse == 0:
+            self.misses += 1
+            CACHE_REQUESTS.labels("kv", "miss").inc()
+            return None
+
+        past_key_values = entry.past_key_values
+        if reuse < len(entry.token_ids):
+            # 일치하지 않는 뒷부분(이전 응답의 재토큰화 차이 등)은 잘라냄
+            if not hasattr(past_key_values, "crop"):
+                self.misses += 1
+                CACHE_REQUESTS.labels("kv", "miss").inc()
+                return None
+            past_key_values.crop(reuse - len(entry.token_ids))  # 음수: 뒤에서 제거할 토큰 수
+
+        self.hits += 1
+        self.reused_tokens += reuse
+        CACHE_REQUESTS.labels("kv", "hit").inc()
+        return past_key_values
+
+    def _match_length(self, entry: _KVCacheEntry, input_ids) -> int:
+        """재사용 가능한 접두 토큰 수 (마지막 입력 토큰은 항상 새로 계산해야 함)"""
+        cached = entry.token_ids
+        limit = min(len(cached), len(input_ids) - 1)
+        if limit <= 0:
+            return 0
+
+        prefix = input_ids[:limit].cpu()
+        # 캐시 전체가 접두와 일치하는 일반적인 경우는 해시 비교로 처리
+        if limit == len(cached) and hash(tuple(prefix.tolist())) == entry.prefix_hash:
+            return limit
+
+        mismatch = (cached[:limit] != prefix).nonzero()
+        return int(mismatch[0]) if len(mismatch) else limit
+
+    def store(self, session_id: str, token_ids, past_key_values: Any):
+        """생성이 끝난 세션 캐시 저장 후 한도를 넘으면 LRU 제거"""
+        length = _cache_length(past_key_values)
+        nbytes = _cache_nbytes(past_key_values)
+        if nbytes > self.max_bytes or self.max_sessions <= 0:
+            return
+
+        entry = _KVCacheEntry(token_ids[:length].cpu(), past_key_values, nbytes)
+        with self._lock:
+            previous = self.entries.pop(session_id, None)
+            if previous is not None:
+                self.total_bytes -= previous.nbytes
+            self.entries[session_id] = entry
+            self.total_bytes += nbytes
+
+            # 고정되지 않은 세션부터 LRU 순서로 제거
+            while len(self.entries) > self.max_sessions or self.total_bytes > self.max_bytes:
+                victim = next((sid for sid in self.entries if sid not in self.pinned), None)
+                if victim is None:
+                    break
+                self.total_bytes -= self.entries.pop(victim).nbytes
+
+            # 고정된 세션만 남았어도 메모리 한도는 지킴
+            while self.entries and self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+
+    def pin(self, session_id: str):
+        """세션 캐시를 LRU 제거 대상에서 제외 (unpin과 짝으로 호출)"""
+        with self._lock:
+            self.pinned[session_id] = self.pinned.get(session_id, 0) + 1
+
+    def unpin(self, session_id: str):
+        with self._lock:
+            count = self.pinned.get(session_id, 0) - 1
+            if count > 0:
+                self.pinned[session_id] = count
+            else:
+                self.pinned.pop(session_id, None)
+
+    def discard(self, session_id: str) -> bool:
+        """세션 캐시 삭제"""
+        with self._lock:
+            entry = self.entries.pop(session_id, None)
+            if entry is None:
+                return False
+            self.total_bytes -= entry.nbytes
+            return True
+
+    def clear(self):
+        """전체 캐시 삭제"""
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
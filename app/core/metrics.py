@@ -0,0 +1,142 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+    class _NoopMetric:
+        """prometheus_client가 없을 때 사용하는 빈 지표"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs) -> "_NoopMetric":
+            return self
+
+        def observe(self, value: float):
+            pass
+
+        def inc(self, value: float = 1):
+            pass
+
+        def set(self, value: float):
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+
+    def generate_latest() -> bytes:
+        return b""
+
+# 추론 단계는 수 ms ~ 수 분까지 분포
+_STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 요청 전체 지연
+REQUEST_LATENCY = Histogram(
+    "mcp_chat_request_seconds", "/api/chat 요청 처리 시간",
+    ["model", "mode", "status"], buckets=_STAGE_BUCKETS
+)
+
+# 모델 추론 단계별 지연 (format_context, tokenize, prefill, decode, detokenize)
+STAGE_LATENCY = Histogram(
+    "mcp_stage_seconds", "추론 단계별 처리 시간",
+    ["stage", "model"], buckets=_STAGE_BUCKETS
+)
+
+# 컨텍스트 스토리지 작업 지연 (get_context, update_context, append_messages, delete_context)
+CONTEXT_LATENCY = Histogram(
+    "mcp_context_seconds", "컨텍스트 스토리지 작업 시간",
+    ["operation", "backend"], buckets=_STAGE_BUCKETS
+)
+
+PROMPT_TOKENS = Counter("mcp_prompt_tokens_total", "모델에 입력된 프롬프트 토큰 수", ["model"])
+GENERATED_TOKENS = Counter("mcp_generated_tokens_total", "생성된 토큰 수", ["model"])
+DECODE_TOKENS_PER_SECOND = Histogram(
+    "mcp_decode_tokens_per_second", "디코딩 단계 초당 생성 토큰 수",
+    ["model"], buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+BATCH_SIZE = Histogram(
+    "mcp_batch_size", "배치 generate 한 번에 처리한 요청 수",
+    ["model"], buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+GENERATIONS_CANCELLED = Counter(
+    "mcp_generations_cancelled_total", "클라이언트 연결 종료 등으로 도중에 멈춘 생성 수", ["model"]
+)
+
+GENERATIONS_TRUNCATED = Counter(
+    "mcp_generations_truncated_total", "요청 마감(timeout_ms)에 걸려 잘린 생성 수", ["model"]
+)
+
+QUEUE_DEPTH = Gauge("mcp_queue_depth", "대기 중인 작업 수", ["model", "queue"])
+INFLIGHT_REQUESTS = Gauge("mcp_inflight_requests", "승인되어 처리 중인 요청 수", ["model"])
+
+# 승인 제어 대기 시간 (result: admitted, timeout, cancelled)
+ADMISSION_WAIT = Histogram(
+    "mcp_admission_wait_seconds", "승인 대기열에서 기다린 시간",
+    ["model", "result"], buckets=(0, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+ADMISSION_REJECTED = Counter(
+    "mcp_admission_rejected_total", "승인 제어로 거절된 요청 수 (reason: queue_full, timeout)",
+    ["model", "reason"]
+)
+
+CACHE_REQUESTS = Counter(
+    "mcp_cache_requests_total", "캐시 조회 결과 (적중률 = hit / (hit + miss))",
+    ["cache", "result"]
+)
+
+MODEL_LOAD_SECONDS = Gauge("mcp_model_load_seconds", "마지막 모델 로드 소요 시간", ["model"])
+
+@contextmanager
+def observe(histogram, *labels: str) -> Iterator[None]:
+    """with 블록 실행 시간을 히스토그램에 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+def observe_stage(stage: str, model: str):
+    """추론 단계 시간 기록"""
+    return observe(STAGE_LATENCY, stage, model)
+
+class StepTimer:
+    """
+    생성 단계 타이머 - generate(stopping_criteria=...)에 넣어 매 디코딩 스텝마다 호출됨
+    첫 호출 시각으로 prefill(첫 토큰까지)과 이후 decode 구간을 나눔
+    멈춤 조건이 아니므로 항상 False 반환
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_step: Optional[float] = None
+        self.steps = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_step is None:
+            self.first_step = time.perf_counter()
+        self.steps += 1
+        import torch
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+    def split(self) -> Tuple[float, float]:
+        """(prefill 시간, decode 시간)"""
+        end = time.perf_counter()
+        first = self.first_step or end
+        return first - self.start, end - first
+
+def record_generation(model: str, timer: StepTimer, prompt_tokens: int, generated_tokens: int):
+    """생성 한 번의 단계별 시간과 토큰 수 기록"""
+    prefill, decode = timer.split()
+    STAGE_LATENCY.labels("prefill", model).observe(prefill)
+    STAGE_LATENCY.labels("decode", model).observe(decode)
+    PROMPT_TOKENS.labels(model).inc(prompt_tokens)
+    GENERATED_TOKENS.labels(model).inc(generated_tokens)
+    # 첫 토큰은 prefill 구간에서 생성됨
+    if decode > 0 and generated_tokens > 1:
+        DECODE_TOKENS_PER_SECOND.labels(model).observe((generated_tokens - 1) / decode)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+# 탐욕 디코딩에서는 결과에 영향이 없는 샘플링 파라미터
+_SAMPLING_ONLY_PARAMS = ("temperature", "top_p", "top_k", "typical_p", "do_sample")
+
+def generation_key(model_name: str, prompt: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    결정적 생성 요청 키 - (모델 이름, 포맷된 프롬프트 해시, 정규화된 생성 파라미터)
+    샘플링이 켜져 있어 결과가 매번 달라지는 요청이면 None
+    """
+    if params.get("do_sample", False) or "streamer" in params:
+        return None
+
+    normalized = {k: v for k, v in params.items() if k not in _SAMPLING_ONLY_PARAMS}
+    payload = json.dumps({
+        "model": model_name,
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "params": normalized
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    응답 캐시 - 결정적 생성(do_sample=False) 결과를 재사용
+    키: (모델 이름, 포맷된 프롬프트 해시, 정규화된 생성 파라미터)
+    메모리 계층은 LRU + 바이트 한도, 선택적으로 Redis 계층을 두어 프로세스 간 공유
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, redis_client: Any = None):
+        self.enabled = settings.RESPONSE_CACHE_ENABLED
+        self.max_bytes = settings.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = settings.RESPONSE_CACHE_TTL
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.bypassed = 0  # 샘플링 요청 등 캐시 대상이 아니었던 요청 수
+
+        if redis_client is None and self.enabled and settings.RESPONSE_CACHE_REDIS:
+            import redis.asyncio as aioredis
+            redis_client = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=settings.REDIS_PASSWORD,
+                max_connections=settings.REDIS_POOL_SIZE
+            )
+        self.redis = redis_client
+
+    async def get(self, key: Optional[str]) -> Optional[str]:
+        """캐시 조회 (메모리 -> Redis 순서), key가 None이면 캐시 대상이 아닌 요청"""
+        if key is None or not self.enabled:
+            self.bypassed += 1
+            CACHE_REQUESTS.labels("response", "bypass").inc()
+            return None
+
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.labels("response", "hit").inc()
+            return value
+
+        if self.redis is not None:
+            try:
+                cached = await self.redis.get(f"response:{key}")
+            except Exception as e:
+                print(f"응답 캐시 Redis 조회 오류: {e}")
+                cached = None
+            if cached is not None:
+                value = cached.decode("utf-8") if isinstance(cached, bytes) else cached
+                self.redis_hits += 1
+                CACHE_REQUESTS.labels("response", "hit").inc()
+                self._put_memory(key, value)
+                return value
+
+        self.misses += 1
+        CACHE_REQUESTS.labels("response", "miss").inc()
+        return None
+
+    async def put(self, key: Optional[str], value: str):
+        """캐시 저장"""
+        if key is None or not self.enabled:
+            return
+        self._put_memory(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.setex(f"response:{key}", self.ttl, value)
+            except Exception as e:
+                print(f"응답 캐시 Redis 저장 오류: {e}")
+
+    def _put_memory(self, key: str, value: str):
+        """메모리 계층 저장 후 바이트 한도를 넘으면 LRU 제거"""
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(key) + len(previous.encode("utf-8"))
+        self.entries[key] = value
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.total_bytes -= len(old_key) + len(old_value.encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/실패 통계"""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": (self.hits + self.redis_hits) / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        """메모리 계층 비우기"""
+        self.entries.clear()
+        self.total_bytes = 0
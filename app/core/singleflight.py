@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class _Call:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    동시 요청 병합 - 같은 키로 진행 중인 작업이 있으면 새로 실행하지 않고 그 결과를 함께 기다림
+    결과와 예외는 모든 대기자에게 전달되고, 대기자가 모두 취소되면 작업도 취소됨
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, _Call] = {}
+        self.coalesced = 0  # 진행 중인 작업에 합류한 요청 수
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self.calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self.calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # 한 대기자의 취소가 공유 작업을 취소하지 않도록 shield 사용
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+        # 대기자가 모두 떠난 뒤 실패한 작업의 예외가 로그에 남지 않도록 조회
+        if not call.task.cancelled():
+            call.task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """진행 중인 고유 작업 수"""
+        return len(self.calls)
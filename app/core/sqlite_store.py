@@ -0,0 +1,320 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# fork 후 자식 프로세스에서 초기화할 스토어 목록
+_stores: "weakref.WeakSet[SQLiteContextStore]" = weakref.WeakSet()
+
+class SQLiteContextStore:
+    """
+    SQLite 컨텍스트 스토리지
+    - WAL 저널 + synchronous=NORMAL
+    - 스레드별 연결: 읽기는 읽기 전용 스레드 풀, 쓰기는 단일 쓰기 스레드에서 실행
+    - 그룹 커밋: 짧은 주기 동안 모인 쓰기/접근 시각 갱신을 한 트랜잭션으로 커밋
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        commit_interval_ms: Optional[int] = None
+    ):
+        self.path = path or settings.SQLITE_PATH
+        self.commit_interval = (
+            settings.SQLITE_COMMIT_INTERVAL_MS if commit_interval_ms is None else commit_interval_ms
+        ) / 1000
+        self.pool_size = pool_size or settings.SQLITE_POOL_SIZE
+        self._start()
+        _stores.add(self)
+
+        self._writer.submit(self._init_db).result()
+
+    def _start(self):
+        """스레드 풀과 대기 작업 초기화 (fork된 자식에서도 호출)"""
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="sqlite-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+        self._pending_writes: List[Tuple[Callable[[sqlite3.Cursor], Any], asyncio.Future]] = []
+        self._pending_touches: Dict[str, int] = {}  # 세션 ID -> 접근 시각 (같은 세션은 하나로 합침)
+        self._flush_task: Optional[asyncio.Future] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """현재 스레드 전용 연결 반환 (없으면 생성)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 트랜잭션은 직접 관리 (BEGIN/COMMIT)
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        """SQLite DB 초기화 (쓰기 스레드에서 실행)"""
+        cursor = self._connect().cursor()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contexts (
+            session_id TEXT PRIMARY KEY,
+            context TEXT,
+            timestamp INTEGER
+        )
+        ''')
+        # 메시지 로그 - 턴마다 새 메시지만 추가 (contexts.context는 이전 버전 데이터 호환용)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS messages (
+            session_id TEXT,
+            seq INTEGER,
+            message TEXT,
+            PRIMARY KEY (session_id, seq)
+        )
+        ''')
+        # 만료 정리용 인덱스
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_contexts_timestamp ON contexts (timestamp)"
+        )
+        # 비동기 작업 (/api/jobs) 상태와 결과
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            job TEXT,
+            timestamp INTEGER
+        )
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_timestamp ON jobs (timestamp)"
+        )
+
+    # 읽기
+
+    async def _read(self, fn: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """읽기 풀 스레드의 연결로 조회 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: fn(self._connect().cursor()))
+
+    async def get_messages(self, session_id: str, cutoff: int) -> Optional[List[Dict[str, Any]]]:
+        """만료되지 않은 세션의 메시지 조회, 접근 시각 갱신은 다음 그룹 커밋에 포함"""
+        def query(cursor: sqlite3.Cursor):
+            cursor.execute(
+                "SELECT context FROM contexts WHERE session_id = ? AND timestamp >= ?",
+                (session_id, cutoff)
+            )
+            result = cursor.fetchone()
+            if not result:
+                return None
+            cursor.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,)
+            )
+            messages = [json.loads(row[0]) for row in cursor.fetchall()]
+            # 메시지 로그 도입 이전에 저장된 세션
+            if not messages and result[0]:
+                messages = json.loads(result[0])
+            return messages
+
+        messages = await self._read(query)
+        if messages is not None:
+            self.touch(session_id)
+        return messages
+
+    # 쓰기 (그룹 커밋)
+
+    async def _write(self, fn: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """쓰기 작업을 다음 그룹 커밋에 넣고 커밋될 때까지 대기"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.append((fn, future))
+        self._schedule_flush()
+        return await future
+
+    def touch(self, session_id: str):
+        """세션 접근 시각 갱신 (기다리지 않음)"""
+        self._pending_touches[session_id] = int(time.time())
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._pending_writes or self._pending_touches:
+            # 커밋 주기 동안 다른 요청의 쓰기를 모음
+            await asyncio.sleep(self.commit_interval)
+            await self.flush()
+        self._flush_task = None
+
+    async def flush(self):
+        """대기 중인 쓰기와 접근 시각 갱신을 한 트랜잭션으로 커밋"""
+        writes, self._pending_writes = self._pending_writes, []
+        touches, self._pending_touches = self._pending_touches, {}
+        if not writes and not touches:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._writer, self._commit_batch, [fn for fn, _ in writes], touches
+            )
+        except Exception as e:
+            for _, future in writes:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(writes, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _commit_batch(self, ops: List[Callable[[sqlite3.Cursor], Any]], touches: Dict[str, int]) -> List[Any]:
+        """쓰기 스레드에서 실행 - 작업별 SAVEPOINT로 실패한 작업만 되돌림"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        results = []
+        cursor.execute("BEGIN")
+        try:
+            for op in ops:
+                cursor.execute("SAVEPOINT op")
+                try:
+                    results.append(op(cursor))
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO op")
+                    results.append(e)
+                cursor.execute("RELEASE op")
+            if touches:
+                cursor.executemany(
+                    "UPDATE contexts SET timestamp = ? WHERE session_id = ?",
+                    [(timestamp, session_id) for session_id, timestamp in touches.items()]
+                )
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        return results
+
+    async def replace_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """세션 메시지 전체 교체"""
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor.executemany(
+                "INSERT INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [(session_id, seq, json.dumps(message)) for seq, message in enumerate(messages)]
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO contexts VALUES (?, NULL, ?)",
+                (session_id, int(time.time()))
+            )
+            return True
+
+        return await self._write(op)
+
+    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """세션 메시지 로그 끝에 추가 (없으면 세션 생성)"""
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute(
+                "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id = ?",
+                (session_id,)
+            )
+            start = cursor.fetchone()[0] + 1
+            rows = messages
+            if start == 0:
+                # 메시지 로그 도입 이전에 저장된 세션은 기존 컨텍스트를 로그 앞쪽으로 옮긴 뒤 추가
+                cursor.execute("SELECT context FROM contexts WHERE session_id = ?", (session_id,))
+                result = cursor.fetchone()
+                if result and result[0]:
+                    rows = json.loads(result[0]) + list(messages)
+            cursor.executemany(
+                "INSERT INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [(session_id, start + i, json.dumps(message)) for i, message in enumerate(rows)]
+            )
+            cursor.execute(
+                "INSERT INTO contexts (session_id, context, timestamp) VALUES (?, NULL, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET context = NULL, timestamp = excluded.timestamp",
+                (session_id, int(time.time()))
+            )
+            return True
+
+        return await self._write(op)
+
+    async def delete_session(self, session_id: str) -> bool:
+        """세션과 메시지 삭제"""
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor.execute("DELETE FROM contexts WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+        self._pending_touches.pop(session_id, None)
+        return await self._write(op)
+
+    async def delete_expired(self, cutoff: int) -> int:
+        """cutoff 이전에 마지막으로 접근한 세션 삭제 (timestamp 인덱스 사용)"""
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute(
+                "DELETE FROM messages WHERE session_id IN "
+                "(SELECT session_id FROM contexts WHERE timestamp < ?)",
+                (cutoff,)
+            )
+            cursor.execute("DELETE FROM contexts WHERE timestamp < ?", (cutoff,))
+            return cursor.rowcount
+
+        return await self._write(op)
+
+    # 비동기 작업
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """저장된 작업 조회"""
+        def query(cursor: sqlite3.Cursor):
+            cursor.execute("SELECT job FROM jobs WHERE job_id = ?", (job_id,))
+            result = cursor.fetchone()
+            return json.loads(result[0]) if result else None
+
+        return await self._read(query)
+
+    async def save_job(self, job_id: str, job: Dict[str, Any]) -> bool:
+        """작업 상태 저장 (같은 ID면 덮어씀)"""
+        data = json.dumps(job, ensure_ascii=False)
+
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                (job_id, data, int(time.time()))
+            )
+            return True
+
+        return await self._write(op)
+
+    async def delete_jobs_before(self, cutoff: int) -> int:
+        """cutoff 이전에 마지막으로 갱신된 작업 삭제"""
+        def op(cursor: sqlite3.Cursor):
+            cursor.execute("DELETE FROM jobs WHERE timestamp < ?", (cutoff,))
+            return cursor.rowcount
+
+        return await self._write(op)
+
+    async def close(self):
+        """남은 쓰기를 커밋하고 스레드 풀 종료"""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+        self._readers.shutdown(wait=True)
+        self._writer.submit(lambda: self._connect().close()).result()
+        self._writer.shutdown(wait=True)
+
+def _reset_stores_after_fork():
+    # 부모의 스레드와 연결은 자식에서 사용할 수 없음
+    for store in list(_stores):
+        store._start()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_stores_after_fork)
@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Collection, List, Optional
+
+class CancelCriteria:
+    """
+    생성 취소 멈춤 조건 - generate(stopping_criteria=...)에 넣으면 매 디코딩 스텝마다 취소 여부 확인
+    요청(행)마다 취소 이벤트를 두어 배치 안에서는 취소된 요청만 멈추고,
+    모든 행이 멈추면 generate가 끝나 워커 스레드가 반납됨
+    """
+
+    def __init__(self, events: List[Optional[threading.Event]]):
+        self.events = events
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        flags = torch.tensor(
+            [event is not None and event.is_set() for event in self.events],
+            dtype=torch.bool, device=input_ids.device
+        )
+        # num_beams/num_return_sequences로 요청마다 여러 행이 있으면 같은 값으로 확장
+        return flags.repeat_interleave(input_ids.shape[0] // len(self.events))
+
+    def cancelled(self) -> int:
+        """취소된 요청 수"""
+        return sum(1 for event in self.events if event is not None and event.is_set())
+
+class Deadline:
+    """
+    요청 마감 시각 - 생성 중 마감을 넘기면 그때까지의 결과를 반환하고 truncated 표시
+    (DeadlineCriteria가 설정하므로 생성 후 호출 측에서 확인)
+    """
+
+    def __init__(self, timeout: float):
+        self.at = time.monotonic() + timeout
+        self.truncated = False
+
+    def remaining(self) -> float:
+        """남은 시간(초), 지났으면 0"""
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+class DeadlineCriteria:
+    """
+    마감 멈춤 조건 - 매 디코딩 스텝마다 요청(행)별 마감을 확인해 지난 행만 멈춤
+    stop_token_ids: 이미 EOS/패딩으로 끝난 배치 행은 잘린 것으로 표시하지 않음
+    """
+
+    def __init__(self, deadlines: List[Optional[Deadline]], stop_token_ids: Collection[int] = ()):
+        self.deadlines = deadlines
+        self.stop_token_ids = set(stop_token_ids)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        now = time.monotonic()
+        rows = input_ids.shape[0] // len(self.deadlines)
+        flags = []
+        for i, deadline in enumerate(self.deadlines):
+            expired = deadline is not None and now >= deadline.at
+            if expired and not deadline.truncated:
+                last_tokens = input_ids[i * rows:(i + 1) * rows, -1].tolist()
+                deadline.truncated = any(token not in self.stop_token_ids for token in last_tokens)
+            flags.append(expired)
+        return torch.tensor(flags, dtype=torch.bool, device=input_ids.device).repeat_interleave(rows)
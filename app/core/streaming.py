@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+_END = object()
+
+class AsyncTextStreamer:
+    """
+    생성 스레드 -> 이벤트 루프 토큰 브리지
+    transformers의 streamer 인터페이스(put/end)를 구현하여 generate(streamer=...)에 전달하면
+    디코딩된 텍스트 조각을 async for로 받을 수 있음 (TextIteratorStreamer의 asyncio 버전)
+    """
+
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, skip_prompt: bool = True, **decode_kwargs):
+        self.tokenizer = tokenizer
+        self.loop = loop
+        self.skip_prompt = skip_prompt
+        self.decode_kwargs = {"skip_special_tokens": True, **decode_kwargs}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.token_cache: List[int] = []
+        self.print_len = 0
+        self.next_tokens_are_prompt = True
+
+    def put(self, value: Any):
+        """새 토큰 수신 (생성 스레드에서 호출)"""
+        if len(value.shape) > 1:
+            if value.shape[0] > 1:
+                raise ValueError("AsyncTextStreamer는 배치 크기 1만 지원합니다")
+            value = value[0]
+
+        # 첫 호출은 프롬프트 토큰
+        if self.skip_prompt and self.next_tokens_are_prompt:
+            self.next_tokens_are_prompt = False
+            return
+
+        self.token_cache.extend(value.tolist())
+        text = self.tokenizer.decode(self.token_cache, **self.decode_kwargs)
+
+        # 멀티바이트 문자가 아직 완성되지 않았으면 다음 토큰까지 대기
+        if text.endswith("\ufffd"):
+            return
+
+        printable = text[self.print_len:]
+        if text.endswith("\n"):
+            # 줄 단위로 캐시를 비워 디코딩 비용을 일정하게 유지
+            self.token_cache = []
+            self.print_len = 0
+        else:
+            self.print_len = len(text)
+
+        if printable:
+            self._emit(printable)
+
+    def end(self):
+        """생성 종료 (생성 스레드에서 호출)"""
+        if self.token_cache:
+            text = self.tokenizer.decode(self.token_cache, **self.decode_kwargs)
+            printable = text[self.print_len:]
+            self.token_cache = []
+            self.print_len = 0
+            if printable:
+                self._emit(printable)
+        self.next_tokens_are_prompt = True
+        self._emit(_END)
+
+    def close(self):
+        """생성이 시작되지 못했거나 실패했을 때 소비자를 깨움 (이벤트 루프에서 호출)"""
+        self.queue.put_nowait(_END)
+
+    def _emit(self, item: Any):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self.queue.get()
+        if item is _END:
+            raise StopAsyncIteration
+        return item
@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Any
+
+from app.core.config import settings
+
+def has_token_count(message: Dict[str, Any], model) -> bool:
+    """메시지에 이 모델의 토큰 수가 캐시되어 있는지 여부"""
+    tokens = message.get("tokens")
+    return isinstance(tokens, dict) and model.name in tokens
+
+def message_token_count(message: Dict[str, Any], model) -> int:
+    """
+    메시지 토큰 수 - 메시지의 "tokens" 필드에 모델별로 캐시된 값 사용
+    캐시가 없으면 모델 토크나이저로 한 번 계산해 저장 (토크나이저가 없으면 글자 수로 추정하고 저장하지 않음)
+    """
+    tokens = message.get("tokens")
+    if has_token_count(message, model):
+        return tokens[model.name]
+
+    count = model.count_tokens(message.get("content", ""))
+    if count is None:
+        return len(message.get("content", "")) // 4 + model.message_token_overhead
+
+    message["tokens"] = {**(tokens if isinstance(tokens, dict) else {}), model.name: count}
+    return count
+
+def annotate_token_counts(messages: List[Dict[str, Any]], model) -> List[Dict[str, Any]]:
+    """저장 전에 새 메시지의 토큰 수를 미리 계산해 메시지와 함께 저장되도록 함"""
+    for message in messages:
+        message_token_count(message, model)
+    return messages
+
+def fit_context_to_budget(
+    context: List[Dict[str, Any]],
+    model,
+    budget: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    토큰 예산에 맞게 컨텍스트 자르기
+    시스템 프롬프트는 항상 유지하고, 남은 예산 안에서 최근 메시지부터 채움
+    (가장 최근 메시지는 예산을 넘더라도 유지)
+    """
+    if budget is None:
+        budget = settings.CONTEXT_TOKEN_BUDGETS.get(model.name, settings.CONTEXT_TOKEN_BUDGET)
+    if budget <= 0 or not context:
+        return context
+
+    counts = [message_token_count(message, model) for message in context]
+    keep = [message.get("role") == "system" for message in context]
+    used = sum(count for count, kept in zip(counts, keep) if kept)
+
+    latest = True
+    for i in range(len(context) - 1, -1, -1):
+        if keep[i]:
+            continue
+        if not latest and used + counts[i] > budget:
+            break
+        keep[i] = True
+        used += counts[i]
+        latest = False
+
+    window = [message for message, kept in zip(context, keep) if kept]
+
+    # 잘린 대화가 어시스턴트 응답으로 시작하지 않도록 정리
+    start = next((i for i, m in enumerate(window) if m.get("role") != "system"), len(window))
+    while start < len(window) - 1 and window[start].get("role") == "assistant":
+        del window[start]
+
+    return window
@@ -1,13 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
-from app.api.routes import router as api_router
+from app.api.routes import router as api_router, context_manager, job_store, model_router
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE_LATEST, METRICS_AVAILABLE, generate_latest
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 시작/종료 시 백그라운드 작업 관리"""
+    # 만료 컨텍스트 정리 스위퍼 시작
+    sweeper = asyncio.create_task(context_manager.run_sweeper())
+    # 보관 시간이 지난 비동기 작업 정리
+    job_sweeper = asyncio.create_task(job_store.run_sweeper())
+    # 모델 미리 로드 및 워밍업 (완료 전까지 /ready는 503)
+    preload = asyncio.create_task(model_router.preload())
+    yield
+    preload.cancel()
+    sweeper.cancel()
+    job_sweeper.cancel()
+    # 작업이 컨텍스트 스토어를 함께 쓸 수 있으므로 먼저 정리
+    await job_store.close()
+    await context_manager.close()
+    model_router.close()
 
 app = FastAPI(
     title="Model Context Protocol Server",
     description="MCP 서버: 다양한 LLM 모델을 통합 관리하는 인터페이스",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -29,6 +53,25 @@ async def root():
         "docs_url": "/docs"
     }
 
+@app.get("/ready")
+async def ready():
+    """
+    준비 상태 확인 - 미리 로드할 모델의 워밍업이 끝나야 200 반환
+    """
+    models = {model.name: model.ready for model in model_router.preload_targets}
+    if model_router.is_ready():
+        return {"status": "ready", "models": models}
+    return JSONResponse(status_code=503, content={"status": "loading", "models": models})
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus 지표 (단계별 지연 히스토그램, 토큰 수, 대기열 길이, 캐시 적중, 모델 로드 시간)
+    """
+    if not METRICS_AVAILABLE:
+        return JSONResponse(status_code=503, content={"detail": "prometheus_client가 설치되어 있지 않습니다"})
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
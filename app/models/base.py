@@ -1,24 +1,172 @@
+import asyncio
+import gc
+import os
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
+
+from app.core.config import settings
+from app.core.executor import InferenceExecutor
+from app.core.singleflight import SingleFlight
+from app.core.stopping import Deadline
+
+# fork 후 자식 프로세스에서 초기화할 모델 목록
+_models: "weakref.WeakSet[BaseModel]" = weakref.WeakSet()
 
 class BaseModel(ABC):
     """모든 LLM 모델의 기본 인터페이스"""
     
+    message_token_overhead = 8  # 메시지당 역할 태그 등 포맷팅으로 추가되는 토큰 수 추정치
+    
     def __init__(self, name: str, model_path: str):
         self.name = name
         self.model_path = model_path
         self.model = None  # 실제 모델 인스턴스
+        self.executor = InferenceExecutor(name)  # 블로킹 추론 작업용 실행기
+        self.ready = False  # 로드 및 워밍업 완료 여부 (메모리 예산 때문에 언로드되어도 유지, 다음 요청 때 다시 로드)
+        self.response_cache = None  # 결정적 생성 응답 캐시 (ModelRouter가 주입)
+        self.inflight = SingleFlight()  # 동일한 결정적 요청의 동시 생성 병합
+        self._load_lock = asyncio.Lock()  # 동시 첫 요청이 load()를 중복 실행하지 않도록 함
+        self.residency = None  # 로드 전에 메모리를 확보하는 관리자 (ModelRouter가 주입)
+        self.active = 0  # 이 모델을 사용 중인 요청 수 (0이면 언로드 가능)
+        self.last_used = 0.0  # 마지막 사용 시각 (LRU 언로드 기준)
+        _models.add(self)
     
     @abstractmethod
     async def load(self) -> bool:
         """모델 로드"""
         pass
     
+    def is_loaded(self) -> bool:
+        """모델 로드 여부"""
+        return self.model is not None
+    
+    @property
+    def state(self) -> str:
+        """상주 상태: resident, loading, unloaded"""
+        if self.is_loaded():
+            return "resident"
+        if self._load_lock.locked():
+            return "loading"
+        return "unloaded"
+    
+    async def ensure_loaded(self) -> bool:
+        """로드되지 않았으면 로드 (모델별 락으로 한 번만 실행)"""
+        if self.is_loaded():
+            return True
+        async with self._load_lock:
+            if self.is_loaded():
+                return True
+            # 메모리 예산을 넘으면 다른 유휴 모델을 먼저 언로드
+            if self.residency is None:
+                return await self.load()
+            await self.residency.make_room(self)
+            try:
+                return await self.load()
+            finally:
+                await self.residency.load_finished(self)
+    
+    @asynccontextmanager
+    async def using(self):
+        """
+        요청 처리 구간 - 사용 중인 모델은 언로드 대상에서 제외
+        로드 전에 사용 수를 올려 로드 직후 다른 모델의 로드로 언로드되지 않도록 함
+        """
+        self.active += 1
+        try:
+            await self.ensure_loaded()
+            yield
+        finally:
+            self.active -= 1
+            self.last_used = time.monotonic()
+    
+    async def unload(self) -> bool:
+        """
+        모델 언로드 - 사용 중이 아닐 때만 가중치 참조를 끊고 gc 실행
+        반환값: 언로드했는지 여부
+        """
+        async with self._load_lock:
+            # 취소된 요청의 생성이 아직 워커 스레드에서 실행 중일 수 있음
+            if self.active > 0 or self.executor.pending > 0 or not self.is_loaded():
+                return False
+            self._release_weights()
+        gc.collect()
+        return True
+    
+    def _release_weights(self):
+        """가중치 참조 해제, 토크나이저 등 추가 자원이 있는 모델은 오버라이드"""
+        self.model = None
+    
+    def memory_footprint(self) -> int:
+        """
+        로드 시 메모리 사용량 추정치(바이트)
+        알 수 없으면 0, 실제 가중치가 있는 모델은 오버라이드
+        """
+        return 0
+    
+    async def warmup(self) -> bool:
+        """
+        짧은 생성으로 워밍업 후 ready 표시
+        첫 실제 요청이 지연 초기화 비용(커널 컴파일, 메모리 할당 등)을 치르지 않도록 함
+        """
+        if not await self.ensure_loaded():
+            return False
+        await self.generate(
+            [{"role": "user", "content": settings.WARMUP_PROMPT}],
+            {"max_new_tokens": settings.WARMUP_MAX_NEW_TOKENS, "do_sample": False}
+        )
+        self.ready = True
+        return True
+    
     @abstractmethod
-    async def generate(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None) -> str:
-        """텍스트 생성"""
+    async def generate(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> str:
+        """
+        텍스트 생성 (session_id는 세션 단위 캐시를 쓰는 모델이 사용)
+        deadline을 넘기면 그때까지 생성한 부분을 반환하고 deadline.truncated 표시
+        """
+        pass
+    
+    async def stream(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """
+        텍스트 스트리밍 생성
+        기본 구현은 전체 생성 결과를 한 번에 반환, 토큰 스트리밍을 지원하는 모델은 오버라이드
+        """
+        yield await self.generate(context, parameters, session_id, deadline)
+    
+    def count_tokens(self, text: str) -> Optional[int]:
+        """
+        메시지 내용의 토큰 수 (포맷팅 오버헤드 포함)
+        정확히 셀 수 없으면 None, 토크나이저가 있는 모델은 오버라이드
+        """
+        return None
+
+    async def ensure_tokenizer(self):
+        """
+        count_tokens가 정확한 값을 내도록 토크나이저 준비 (가중치는 로드하지 않음)
+        기본 구현은 아무것도 하지 않음, 토크나이저를 따로 로드하는 모델은 오버라이드
+        """
+        pass
+
+    def release_session(self, session_id: str):
+        """세션에 묶인 모델 측 자원(KV 캐시 등) 해제, 기본 구현은 아무것도 하지 않음"""
+        pass
+    
+    def pin_session(self, session_id: str):
+        """세션 자원(KV 캐시 등)을 제거 대상에서 제외 (unpin_session과 짝), 기본 구현은 아무것도 하지 않음"""
         pass
     
+    def unpin_session(self, session_id: str):
+        """pin_session 해제"""
+        pass
+    
+    def close(self):
+        """실행 자원 정리 (앱 종료 시)"""
+        self.executor.shutdown(wait=False)
+    
     @abstractmethod
     def get_info(self) -> Dict[str, Any]:
         """모델 정보 반환"""
@@ -43,4 +191,12 @@ class BaseModel(ABC):
         
         # 마지막 응답 유도
         formatted += "<assistant>\n"
-        return formatted
\ No newline at end of file
+        return formatted
+
+def _reset_models_after_fork():
+    # 부모의 이벤트 루프에 묶였을 수 있는 락은 자식의 루프에서 새로 생성
+    for model in list(_models):
+        model._load_lock = asyncio.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_models_after_fork)
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any
+
+from app.models.base import BaseModel
+from app.core.config import settings
+from app.core.metrics import (
+    GENERATIONS_CANCELLED, GENERATIONS_TRUNCATED, StepTimer, observe_stage, record_generation
+)
+from app.core.stopping import Deadline
+
+class FakeModel(BaseModel):
+    """
+    가짜 모델 - 체크포인트 없이 추론 지연만 흉내 냄 (부하 테스트/벤치마크용)
+    prefill(고정 + 프롬프트 토큰당)과 토큰당 생성 지연 동안 추론 실행기 워커를 점유하므로
+    대기열/동시성 동작은 실제 모델과 같음
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        prefill_ms: Optional[float] = None,
+        prefill_ms_per_token: Optional[float] = None,
+        token_ms: Optional[float] = None,
+        output_tokens: Optional[int] = None
+    ):
+        super().__init__(name, "fake")
+        self.prefill_ms = settings.FAKE_PREFILL_MS if prefill_ms is None else prefill_ms
+        self.prefill_ms_per_token = (
+            settings.FAKE_PREFILL_MS_PER_TOKEN if prefill_ms_per_token is None else prefill_ms_per_token
+        )
+        self.token_ms = settings.FAKE_TOKEN_MS if token_ms is None else token_ms
+        self.output_tokens = settings.FAKE_OUTPUT_TOKENS if output_tokens is None else output_tokens
+
+    async def load(self) -> bool:
+        """로드할 가중치 없음"""
+        self.model = "fake"  # 로드 완료 표시
+        return True
+
+    async def generate(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> str:
+        """지연 후 고정된 토큰열 반환"""
+        async with self.using():
+            with observe_stage("format_context", self.name):
+                prompt = self.format_context(context)
+            cancel = threading.Event()
+            try:
+                return await self.executor.submit(
+                    self._generate_sync, prompt, self._output_length(parameters), None, cancel, deadline
+                )
+            except asyncio.CancelledError:
+                cancel.set()
+                raise
+
+    async def stream(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """생성 스레드가 토큰마다 이벤트 루프로 전달"""
+        async with self.using():
+            with observe_stage("format_context", self.name):
+                prompt = self.format_context(context)
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            cancel = threading.Event()
+            task = asyncio.ensure_future(self.executor.submit(
+                self._generate_sync, prompt, self._output_length(parameters),
+                lambda text: loop.call_soon_threadsafe(queue.put_nowait, text), cancel, deadline
+            ))
+            task.add_done_callback(lambda _: queue.put_nowait(None))
+
+            try:
+                while True:
+                    text = await queue.get()
+                    if text is None:
+                        break
+                    yield text
+                await task
+            finally:
+                if not task.done():
+                    cancel.set()
+                    task.cancel()
+
+    def count_tokens(self, text: str) -> Optional[int]:
+        """공백 단위 토큰 수"""
+        return len(text.split()) + self.message_token_overhead
+
+    def get_info(self) -> Dict[str, Any]:
+        """모델 정보 반환"""
+        return {
+            "id": self.name,
+            "name": "Fake Model",
+            "description": "부하 테스트용 가짜 모델 (지연만 흉내 냄)",
+            "capabilities": ["text-generation"],
+            "languages": ["en", "ko"]
+        }
+
+    def _output_length(self, parameters: Optional[Dict[str, Any]]) -> int:
+        max_new_tokens = (parameters or {}).get("max_new_tokens", self.output_tokens)
+        return max(0, min(self.output_tokens, max_new_tokens))
+
+    def _generate_sync(
+        self,
+        prompt: str,
+        length: int,
+        on_token: Optional[Callable[[str], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """prefill/디코딩 지연 흉내 (워커 스레드에서 실행, 취소되거나 마감이 지나면 다음 토큰에서 멈춤)"""
+        prompt_tokens = len(prompt.split())
+        timer = StepTimer()
+        time.sleep((self.prefill_ms + self.prefill_ms_per_token * prompt_tokens) / 1000)
+        timer.first_step = time.perf_counter()
+
+        tokens = []
+        for i in range(length):
+            if cancel is not None and cancel.is_set():
+                GENERATIONS_CANCELLED.labels(self.name).inc()
+                break
+            if deadline is not None and deadline.expired():
+                deadline.truncated = True
+                GENERATIONS_TRUNCATED.labels(self.name).inc()
+                break
+            if i > 0:
+                time.sleep(self.token_ms / 1000)
+            token = f" tok{i}" if i else f"tok{i}"
+            tokens.append(token)
+            if on_token is not None:
+                on_token(token)
+
+        record_generation(self.name, timer, prompt_tokens, len(tokens))
+        return "".join(tokens)
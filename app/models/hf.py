@@ -0,0 +1,420 @@
+import asyncio
+import glob
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any
+
+from app.models.base import BaseModel
+from app.core.config import settings
+from app.core.executor import ExecutorQueueFullError
+from app.core.batching import BatchScheduler
+from app.core.streaming import AsyncTextStreamer
+from app.core.kv_cache import KVCacheStore
+from app.core.response_cache import generation_key
+from app.core.metrics import (
+    BATCH_SIZE, GENERATIONS_CANCELLED, GENERATIONS_TRUNCATED, MODEL_LOAD_SECONDS,
+    StepTimer, observe_stage, record_generation
+)
+from app.core.stopping import CancelCriteria, Deadline, DeadlineCriteria
+
+# transformers의 지연 임포트는 여러 스레드에서 처음 동시에 실행되면 실패할 수 있으므로 임포트만 하나씩 실행
+_import_lock = threading.Lock()
+
+def _auto_classes():
+    """(AutoModelForCausalLM, AutoTokenizer) - 처음 한 번만 실제로 임포트되고 이후에는 바로 반환"""
+    with _import_lock:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+    return AutoModelForCausalLM, AutoTokenizer
+
+class HuggingFaceModel(BaseModel):
+    """transformers CausalLM 기반 모델 공통 구현"""
+
+    display_name = "HuggingFace"
+
+    def __init__(self, name: str, model_path: str):
+        super().__init__(name, model_path)
+        self.tokenizer = None
+        # torch 임포트는 수 초가 걸리므로 장치 확인은 첫 로드 때 수행
+        self.device = None
+        # 동시 요청을 배치 generate로 묶는 스케줄러
+        self.scheduler = BatchScheduler(self.executor, self._generate_batch_sync)
+        # 대화 턴 사이에 재사용하는 세션별 KV 캐시
+        self.kv_cache = KVCacheStore()
+        self._footprint = 0  # 마지막으로 로드했을 때 측정한 메모리 사용량
+        self._tokenizer_lock = asyncio.Lock()
+
+    def _is_cuda_available(self) -> bool:
+        """CUDA 사용 가능 여부 확인"""
+        try:
+            import torch
+            return torch.cuda.is_available()
+        except ImportError:
+            return False
+
+    def is_loaded(self) -> bool:
+        """모델과 토크나이저가 모두 로드되었는지 여부"""
+        return self.model is not None and self.tokenizer is not None
+
+    async def load(self) -> bool:
+        """모델 및 토크나이저 로드"""
+        try:
+            # 가중치 로드도 블로킹 작업이므로 추론 실행기에서 수행
+            await self.executor.submit(self._load_sync)
+            return True
+        except Exception as e:
+            print(f"{self.display_name} 모델 로드 오류: {e}")
+            return False
+
+    def _load_sync(self):
+        """모델 및 토크나이저 로드 (워커 스레드에서 실행)"""
+        start = time.perf_counter()
+        if self.device is None:
+            self.device = "cuda" if self._is_cuda_available() else "cpu"
+        self._load_tokenizer_sync()
+        auto_model, _ = _auto_classes()
+        self.model = auto_model.from_pretrained(
+            self.model_path,
+            device_map="auto" if self.device == "cuda" else None,
+            torch_dtype="auto"
+        )
+        MODEL_LOAD_SECONDS.labels(self.name).set(time.perf_counter() - start)
+        self._footprint = self.model.get_memory_footprint()
+
+    def _load_tokenizer_sync(self):
+        """토크나이저 로드 (워커 스레드에서 실행)"""
+        _, auto_tokenizer = _auto_classes()
+        tokenizer = auto_tokenizer.from_pretrained(self.model_path)
+        # 배치 생성 시 프롬프트 끝이 맞춰지도록 왼쪽 패딩 사용
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self.tokenizer = tokenizer
+
+    async def ensure_tokenizer(self):
+        """
+        가중치 없이 토크나이저만 로드 - 모델 로드 전에도 메시지 토큰 수를 정확히 계산해 저장하도록 함
+        추론 실행기가 아닌 기본 스레드 풀에서 로드해 진행 중인 생성 뒤에 줄 서지 않음
+        """
+        if self.tokenizer is not None:
+            return
+        async with self._tokenizer_lock:
+            if self.tokenizer is not None:
+                return
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._load_tokenizer_sync)
+            except Exception as e:
+                print(f"{self.display_name} 토크나이저 로드 오류: {e}")
+
+    def _release_weights(self):
+        """가중치와 세션 KV 캐시 해제 (작은 토크나이저는 토큰 수 계산용으로 남김)"""
+        self.model = None
+        self.kv_cache.clear()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+
+    def memory_footprint(self) -> int:
+        """로드한 적이 있으면 측정값, 없으면 체크포인트 파일 크기로 추정"""
+        if self._footprint:
+            return self._footprint
+        for pattern in ("*.safetensors", "*.bin"):
+            files = glob.glob(os.path.join(self.model_path, pattern))
+            if files:
+                return sum(os.path.getsize(f) for f in files)
+        return 0
+
+    def build_parameters(self, parameters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """기본 생성 파라미터에 사용자 파라미터를 덮어씀"""
+        params = {
+            "max_new_tokens": settings.MAX_NEW_TOKENS,
+            "temperature": settings.TEMPERATURE,
+            "top_p": settings.TOP_P,
+            "do_sample": True
+        }
+
+        if parameters:
+            params.update(parameters)
+
+        # temperature 0은 탐욕 디코딩으로 처리 (응답 캐시 대상)
+        if params.get("temperature") == 0:
+            params["do_sample"] = False
+        if not params.get("do_sample"):
+            params.pop("temperature", None)
+            params.pop("top_p", None)
+        return params
+
+    async def warmup(self) -> bool:
+        """짧은 탐욕 생성으로 워밍업 (오류를 삼키는 generate 대신 실행기를 직접 사용)"""
+        async with self.using():
+            if not self.is_loaded():
+                return False
+
+            prompt = self.format_context([{"role": "user", "content": settings.WARMUP_PROMPT}])
+            params = self.build_parameters({
+                "max_new_tokens": settings.WARMUP_MAX_NEW_TOKENS,
+                "do_sample": False
+            })
+            try:
+                await self.executor.submit(self._generate_sync, prompt, params)
+            except Exception as e:
+                print(f"{self.display_name} 워밍업 오류: {e}")
+                return False
+
+        self.ready = True
+        return True
+
+    async def generate(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> str:
+        """텍스트 생성 (deadline을 넘기면 그때까지 생성한 부분을 반환)"""
+        async with self.using():
+            params = self.build_parameters(parameters)
+
+            try:
+                # 컨텍스트 포맷팅
+                with observe_stage("format_context", self.name):
+                    prompt = self.format_context(context)
+
+                # 결정적 생성이면 응답 캐시 확인
+                request_key = generation_key(self.name, prompt, params)
+                if self.response_cache is not None:
+                    cached = await self.response_cache.get(request_key)
+                    if cached is not None:
+                        return cached
+
+                async def run() -> str:
+                    # 토큰화/생성/디코딩은 배치 스케줄러를 거쳐 추론 실행기에서 수행
+                    cancel = threading.Event()
+                    try:
+                        if self.scheduler.max_batch_size > 1:
+                            response = await self.scheduler.submit((prompt, session_id, cancel, deadline), params)
+                        else:
+                            response = await self.executor.submit(
+                                self._generate_sync, prompt, params, None, session_id, cancel, deadline
+                            )
+                    except asyncio.CancelledError:
+                        # 기다리는 호출자가 모두 떠나면 워커 스레드의 생성도 다음 디코딩 스텝에서 멈춤
+                        cancel.set()
+                        raise
+                    # 마감으로 잘린 응답은 캐시하지 않음
+                    if self.response_cache is not None and not (deadline and deadline.truncated):
+                        await self.response_cache.put(request_key, response)
+                    return response
+
+                # 같은 결정적 요청이 이미 생성 중이면 그 결과를 함께 기다림
+                # (마감이 있는 요청은 다른 요청의 마감으로 잘린 결과를 받지 않도록 따로 생성)
+                if request_key is not None and deadline is None:
+                    return await self.inflight.do(request_key, run)
+                return await run()
+
+            except ExecutorQueueFullError:
+                raise
+            except Exception as e:
+                print(f"{self.display_name} 생성 오류: {e}")
+                return f"오류 발생: {str(e)}"
+
+    async def stream(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """생성되는 텍스트를 토큰 단위로 스트리밍 (배치 스케줄러를 거치지 않음)"""
+        async with self.using():
+            params = self.build_parameters(parameters)
+            with observe_stage("format_context", self.name):
+                prompt = self.format_context(context)
+
+            # 캐시된 응답은 한 번에 전송
+            request_key = generation_key(self.name, prompt, params)
+            if self.response_cache is not None:
+                cached = await self.response_cache.get(request_key)
+                if cached is not None:
+                    yield cached
+                    return
+
+            streamer = AsyncTextStreamer(self.tokenizer, asyncio.get_running_loop())
+            cancel = threading.Event()
+            task = asyncio.ensure_future(
+                self.executor.submit(self._generate_sync, prompt, params, streamer, session_id, cancel, deadline)
+            )
+
+            def _on_done(t: asyncio.Future):
+                # 실행기에 들어가지 못하거나 생성이 실패해도 소비자가 멈추지 않도록 함
+                if t.cancelled() or t.exception() is not None:
+                    streamer.close()
+
+            task.add_done_callback(_on_done)
+
+            try:
+                async for text in streamer:
+                    yield text
+                response = await task
+                if self.response_cache is not None and not (deadline and deadline.truncated):
+                    await self.response_cache.put(request_key, response)
+            finally:
+                # 소비자가 떠나면 (연결 종료 등) 워커 스레드의 생성도 멈춤
+                if not task.done():
+                    cancel.set()
+                    task.cancel()
+
+    def count_tokens(self, text: str) -> Optional[int]:
+        """토크나이저로 메시지 토큰 수 계산 (로드 전이면 None)"""
+        if self.tokenizer is None:
+            return None
+        return len(self.tokenizer.encode(text, add_special_tokens=False)) + self.message_token_overhead
+
+    def _stop_token_ids(self) -> List[int]:
+        """생성이 정상적으로 끝난 행을 나타내는 토큰 (EOS, 패딩)"""
+        return [
+            token_id for token_id in (self.tokenizer.eos_token_id, self.tokenizer.pad_token_id)
+            if token_id is not None
+        ]
+
+    def release_session(self, session_id: str):
+        """세션 KV 캐시 해제"""
+        self.kv_cache.discard(session_id)
+
+    def pin_session(self, session_id: str):
+        """연결 중인 세션의 KV 캐시가 LRU로 제거되지 않도록 고정"""
+        self.kv_cache.pin(session_id)
+
+    def unpin_session(self, session_id: str):
+        self.kv_cache.unpin(session_id)
+
+    def _generate_sync(
+        self,
+        prompt: str,
+        params: Dict[str, Any],
+        streamer: Optional[AsyncTextStreamer] = None,
+        session_id: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """토큰화, 생성, 디코딩 (워커 스레드에서 실행)"""
+        import torch
+        from transformers import StoppingCriteriaList
+
+        # 대기 중에 마감이 지났으면 생성하지 않음
+        if deadline is not None and deadline.expired():
+            deadline.truncated = True
+            GENERATIONS_TRUNCATED.labels(self.name).inc()
+            if streamer is not None:
+                streamer.end()
+            return ""
+
+        # 토큰화
+        with observe_stage("tokenize", self.name):
+            inputs = self.tokenizer(prompt, return_tensors="pt")
+            if self.device == "cuda":
+                inputs = inputs.to("cuda")
+        input_ids = inputs["input_ids"]
+
+        # 디코딩 스텝마다 호출되어 prefill/decode 구간을 나눠 측정하고 취소/마감 확인
+        timer = StepTimer()
+        cancel_criteria = CancelCriteria([cancel])
+        params = {
+            **params,
+            "attention_mask": inputs["attention_mask"],
+            "stopping_criteria": StoppingCriteriaList([
+                timer, cancel_criteria, DeadlineCriteria([deadline], self._stop_token_ids())
+            ])
+        }
+        if streamer is not None:
+            params["streamer"] = streamer
+
+        # 세션 KV 캐시가 있으면 일치하는 접두 부분의 prefill 생략
+        use_kv_cache = (
+            session_id is not None
+            and self.kv_cache.enabled
+            and params.get("num_beams", 1) == 1
+            and params.get("num_return_sequences", 1) == 1
+        )
+        if use_kv_cache:
+            past_key_values = self.kv_cache.take(session_id, input_ids[0])
+            if past_key_values is not None:
+                params["past_key_values"] = past_key_values
+            params.update(use_cache=True, return_dict_in_generate=True)
+
+        # 생성
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids,
+                **params
+            )
+
+        if use_kv_cache:
+            sequences = outputs.sequences
+            self.kv_cache.store(session_id, sequences[0], outputs.past_key_values)
+        else:
+            sequences = outputs
+
+        generated = sequences[0][input_ids.shape[1]:]
+        record_generation(self.name, timer, input_ids.shape[1], len(generated))
+        if cancel_criteria.cancelled():
+            GENERATIONS_CANCELLED.labels(self.name).inc()
+        if deadline is not None and deadline.truncated:
+            GENERATIONS_TRUNCATED.labels(self.name).inc()
+
+        # 결과 디코딩
+        with observe_stage("detokenize", self.name):
+            return self.tokenizer.decode(generated, skip_special_tokens=True)
+
+    def _generate_batch_sync(
+        self,
+        requests: List[Tuple[str, Optional[str], Optional[threading.Event], Optional[Deadline]]],
+        params: Dict[str, Any]
+    ) -> List[str]:
+        """
+        왼쪽 패딩한 (프롬프트, 세션 ID, 취소 이벤트, 마감) 묶음을 한 번의 generate로 처리 (워커 스레드에서 실행)
+        """
+        if len(requests) == 1:
+            prompt, session_id, cancel, deadline = requests[0]
+            return [self._generate_sync(prompt, params, None, session_id, cancel, deadline)]
+
+        import torch
+        from transformers import StoppingCriteriaList
+
+        BATCH_SIZE.labels(self.name).observe(len(requests))
+
+        # 배치 생성에서는 세션 KV 캐시를 사용하지 않음
+        # (남아 있는 캐시는 다음 단독 생성 때 일치하는 접두까지 잘라 재사용됨)
+        prompts = [prompt for prompt, _, _, _ in requests]
+        deadlines = [deadline for _, _, _, deadline in requests]
+
+        with observe_stage("tokenize", self.name):
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+            if self.device == "cuda":
+                inputs = inputs.to("cuda")
+
+        # 취소되었거나 마감이 지난 요청의 행만 멈추고 나머지 행은 계속 생성
+        timer = StepTimer()
+        cancel_criteria = CancelCriteria([cancel for _, _, cancel, _ in requests])
+        # 요청 파라미터에 같은 키가 있어도 배치 생성에 필요한 값으로 덮어씀
+        params = {
+            **params,
+            "attention_mask": inputs["attention_mask"],
+            "pad_token_id": self.tokenizer.pad_token_id,
+            "stopping_criteria": StoppingCriteriaList([
+                timer, cancel_criteria, DeadlineCriteria(deadlines, self._stop_token_ids())
+            ])
+        }
+        with torch.no_grad():
+            outputs = self.model.generate(inputs["input_ids"], **params)
+
+        # 왼쪽 패딩이므로 모든 행에서 생성 토큰은 같은 위치부터 시작
+        prompt_length = inputs["input_ids"].shape[1]
+        generated = outputs[:, prompt_length:]
+        record_generation(
+            self.name, timer,
+            int(inputs["attention_mask"].sum()),
+            int((generated != self.tokenizer.pad_token_id).sum())
+        )
+        if cancel_criteria.cancelled():
+            GENERATIONS_CANCELLED.labels(self.name).inc(cancel_criteria.cancelled())
+        truncated = sum(1 for deadline in deadlines if deadline is not None and deadline.truncated)
+        if truncated:
+            GENERATIONS_TRUNCATED.labels(self.name).inc(truncated)
+
+        stride = outputs.shape[0] // len(prompts)  # num_return_sequences 대응
+        with observe_stage("detokenize", self.name):
+            return [
+                self.tokenizer.decode(generated[i * stride], skip_special_tokens=True)
+                for i in range(len(prompts))
+            ]
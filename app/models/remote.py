@@ -0,0 +1,416 @@
+import asyncio
+import itertools
+import multiprocessing
+import signal
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any, Type
+
+from app.models.base import BaseModel
+from app.core.config import settings
+from app.core.executor import ExecutorQueueFullError
+from app.core.metrics import QUEUE_DEPTH
+from app.core.stopping import Deadline
+
+class WorkerCrashedError(Exception):
+    """모델 워커 프로세스가 요청 처리 중 종료되었을 때 발생"""
+    pass
+
+class RemoteModelError(Exception):
+    """모델 워커에서 발생한 오류"""
+    pass
+
+# 워커 프로세스
+
+def _worker_main(conn, model_cls: Type[BaseModel], name: str, overrides: Dict[str, Any]):
+    """모델 워커 프로세스 진입점 (spawn으로 시작)"""
+    # Ctrl+C는 웹 프로세스가 처리하고 종료 메시지를 보냄
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 웹 프로세스에서 실행 중에 바뀐 설정 반영
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    asyncio.run(_serve(conn, model_cls, name))
+
+async def _serve(conn, model_cls: Type[BaseModel], name: str):
+    """파이프로 받은 요청을 실제 모델로 처리"""
+    from app.core.response_cache import ResponseCache
+
+    loop = asyncio.get_running_loop()
+    model = model_cls(name)
+    model.response_cache = ResponseCache()
+    inbox: asyncio.Queue = asyncio.Queue()
+    tasks: Dict[int, asyncio.Future] = {}
+
+    def read():
+        # 블로킹 recv는 별도 스레드에서 (웹 프로세스가 사라지면 종료)
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = ("shutdown",)
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message[0] == "shutdown":
+                return
+
+    threading.Thread(target=read, name=f"model-worker-{name}-reader", daemon=True).start()
+
+    def send(*message):
+        try:
+            conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    async def handle(request_id: int, op: str, args: tuple):
+        try:
+            if op in ("generate", "stream"):
+                # 마감은 남은 시간(초)으로 받아 워커 시계 기준으로 다시 계산
+                context, parameters, session_id, timeout = args
+                deadline = Deadline(timeout) if timeout is not None else None
+                if op == "generate":
+                    text = await model.generate(context, parameters, session_id, deadline)
+                    send("result", request_id, (text, bool(deadline and deadline.truncated)))
+                else:
+                    async for text in model.stream(context, parameters, session_id, deadline):
+                        send("token", request_id, text)
+                    send("result", request_id, bool(deadline and deadline.truncated))
+            elif op == "load":
+                ok = await model.ensure_loaded()
+                send("result", request_id, {"ok": ok, "memory_bytes": model.memory_footprint()})
+            elif op == "warmup":
+                send("result", request_id, await model.warmup())
+            else:
+                send("error", request_id, "ValueError", f"알 수 없는 요청: {op}")
+        except asyncio.CancelledError:
+            send("cancelled", request_id)
+        except ExecutorQueueFullError as e:
+            send("error", request_id, "ExecutorQueueFullError", str(e))
+        except Exception as e:
+            send("error", request_id, type(e).__name__, str(e))
+        finally:
+            tasks.pop(request_id, None)
+
+    while True:
+        message = await inbox.get()
+        kind = message[0]
+        if kind == "call":
+            _, request_id, op, args = message
+            tasks[request_id] = asyncio.ensure_future(handle(request_id, op, args))
+        elif kind == "cancel":
+            task = tasks.get(message[1])
+            if task is not None:
+                task.cancel()
+        elif kind == "release":
+            model.release_session(message[1])
+        elif kind == "pin":
+            model.pin_session(message[1])
+        elif kind == "unpin":
+            model.unpin_session(message[1])
+        elif kind == "shutdown":
+            break
+
+    for task in list(tasks.values()):
+        task.cancel()
+    model.executor.shutdown(wait=False)
+
+# 웹 프로세스 측 클라이언트
+
+class _RemoteCall:
+    """워커에 보낸 요청 하나의 결과 대기"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, stream: bool = False):
+        self.future = loop.create_future()
+        self.tokens: Optional[asyncio.Queue] = asyncio.Queue() if stream else None
+
+class RemoteModel(BaseModel):
+    """
+    모델 워커 프로세스 클라이언트 - 추론은 모델별 전용 프로세스에서 실행하고
+    웹 프로세스는 파이프로 요청/결과만 주고받음 (토큰화/생성 루프의 GIL 경합이 HTTP 처리에 영향을 주지 않음)
+    - 워커당 동시 요청 수 제한 (초과분은 대기, 대기열 한도를 넘으면 ExecutorQueueFullError)
+    - 워커가 비정상 종료되면 진행 중인 요청은 WorkerCrashedError로 실패하고 워커는 백오프 후 다시 시작
+    """
+
+    def __init__(self, model_cls: Type[BaseModel], name: str, concurrency: Optional[int] = None):
+        # 모델 정보/포맷팅/메모리 추정용 인스턴스 (가중치는 로드하지 않음)
+        self.local = model_cls(name)
+        super().__init__(name, self.local.model_path)
+        self.model_cls = model_cls
+        self.concurrency = concurrency or settings.MODEL_WORKER_CONCURRENCY
+        self.max_queue = settings.INFERENCE_MAX_QUEUE
+        self.pending = 0  # 실행 중 + 대기 중인 요청 수
+        self.process = None
+        self.conn = None
+        self.calls: Dict[int, _RemoteCall] = {}
+        self.crashes = 0  # 연속 비정상 종료 횟수 (재시작 백오프 계산)
+        self._ids = itertools.count()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._footprint = 0
+
+    # 워커 프로세스 관리
+
+    def _start_process(self):
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.model_cls, self.name, settings.dict()),
+            name=f"model-worker-{self.name}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        self._loop = asyncio.get_running_loop()
+        self.process = process
+        self.conn = parent_conn
+        threading.Thread(
+            target=self._read_loop, args=(parent_conn, process),
+            name=f"model-worker-{self.name}-client", daemon=True
+        ).start()
+
+    def _read_loop(self, conn, process):
+        """워커 응답 수신 (별도 스레드) - 파이프가 닫히면 워커 종료 처리"""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+        process.join(timeout=5)
+        self._loop.call_soon_threadsafe(self._on_worker_exit, process)
+
+    def _dispatch(self, message: tuple):
+        kind, request_id = message[0], message[1]
+        call = self.calls.get(request_id)
+        if call is None:
+            return
+        if kind == "token":
+            call.tokens.put_nowait(message[2])
+            return
+
+        if kind == "result":
+            if not call.future.done():
+                call.future.set_result(message[2])
+        elif kind == "error":
+            error_type, detail = message[2], message[3]
+            if not call.future.done():
+                if error_type == "ExecutorQueueFullError":
+                    call.future.set_exception(ExecutorQueueFullError(detail))
+                else:
+                    call.future.set_exception(RemoteModelError(f"{error_type}: {detail}"))
+        elif kind == "cancelled":
+            call.future.cancel()
+        if call.tokens is not None:
+            call.tokens.put_nowait(None)
+
+    def _on_worker_exit(self, process):
+        # 정상 종료를 요청해 이미 분리한 워커
+        if process is not self.process:
+            return
+        was_loaded = self.model is not None
+        self.process = None
+        self.conn = None
+        self.model = None
+
+        for call in self.calls.values():
+            if not call.future.done():
+                call.future.set_exception(WorkerCrashedError(
+                    f"모델 워커 {self.name}가 종료되었습니다 (종료 코드 {process.exitcode})"
+                ))
+            if call.tokens is not None:
+                call.tokens.put_nowait(None)
+        self.calls.clear()
+
+        self.crashes += 1
+        print(f"모델 워커 {self.name} 비정상 종료 (종료 코드 {process.exitcode}, 연속 {self.crashes}회)")
+        if was_loaded:
+            asyncio.ensure_future(self._restart())
+
+    async def _restart(self):
+        """백오프 후 워커 다시 시작"""
+        delay = min(30.0, settings.MODEL_WORKER_RESTART_BACKOFF * 2 ** (self.crashes - 1))
+        await asyncio.sleep(delay)
+        if await self.ensure_loaded():
+            print(f"모델 워커 {self.name} 재시작 완료")
+
+    def _stop_process(self):
+        """워커에 종료 요청 후 분리 (재시작하지 않음, 다음 로드는 새 워커로)"""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(("shutdown",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process = None
+        self.conn = None
+
+    # 요청 전송
+
+    def _call(self, op: str, *args, stream: bool = False):
+        if self.conn is None:
+            raise WorkerCrashedError(f"모델 워커 {self.name}가 실행 중이 아닙니다")
+        request_id = next(self._ids)
+        call = _RemoteCall(asyncio.get_running_loop(), stream)
+        self.calls[request_id] = call
+        self.conn.send(("call", request_id, op, args))
+        return request_id, call
+
+    async def _request(self, op: str, *args) -> Any:
+        """요청을 보내고 결과를 기다림"""
+        request_id, call = self._call(op, *args)
+        try:
+            return await call.future
+        finally:
+            self.calls.pop(request_id, None)
+
+    def _cancel(self, request_id: int):
+        self.calls.pop(request_id, None)
+        if self.conn is not None:
+            try:
+                self.conn.send(("cancel", request_id))
+            except (BrokenPipeError, OSError):
+                pass
+
+    @asynccontextmanager
+    async def _slot(self):
+        """워커당 동시 요청 수 제한"""
+        if self.max_queue >= 0 and self.pending >= self.concurrency + self.max_queue:
+            raise ExecutorQueueFullError(
+                f"모델 {self.name}의 워커 대기열이 가득 찼습니다 ({self.pending}개 처리 중)"
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        self.pending += 1
+        QUEUE_DEPTH.labels(self.name, "worker").set(max(0, self.pending - self.concurrency))
+        try:
+            async with self._slots:
+                yield
+        finally:
+            self.pending -= 1
+            QUEUE_DEPTH.labels(self.name, "worker").set(max(0, self.pending - self.concurrency))
+
+    # BaseModel 인터페이스
+
+    def is_loaded(self) -> bool:
+        """워커가 실행 중이고 모델을 로드했는지 여부"""
+        return self.model is not None and self.process is not None and self.process.is_alive()
+
+    async def load(self) -> bool:
+        """워커 프로세스를 시작하고 워커에서 모델 로드"""
+        try:
+            if self.process is None:
+                self._start_process()
+            result = await self._request("load")
+        except Exception as e:
+            print(f"모델 워커 {self.name} 로드 오류: {e}")
+            return False
+
+        if result["ok"]:
+            self.model = self.process  # 로드 완료 표시
+            self._footprint = result["memory_bytes"]
+            self.crashes = 0
+        return result["ok"]
+
+    async def warmup(self) -> bool:
+        """워커에서 워밍업"""
+        async with self.using():
+            if not self.is_loaded():
+                return False
+            self.ready = bool(await self._request("warmup"))
+            return self.ready
+
+    async def generate(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> str:
+        """워커에서 텍스트 생성"""
+        async with self.using():
+            async with self._slot():
+                request_id, call = self._call(
+                    "generate", context, parameters, session_id, deadline.remaining() if deadline else None
+                )
+                try:
+                    text, truncated = await call.future
+                    if deadline is not None and truncated:
+                        deadline.truncated = True
+                    return text
+                except asyncio.CancelledError:
+                    # 요청이 취소되면 워커의 생성도 취소
+                    self._cancel(request_id)
+                    raise
+                finally:
+                    self.calls.pop(request_id, None)
+
+    async def stream(self, context: List[Dict[str, Any]], parameters: Dict[str, Any] = None, session_id: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """워커에서 생성되는 텍스트를 그대로 전달"""
+        async with self.using():
+            async with self._slot():
+                request_id, call = self._call(
+                    "stream", context, parameters, session_id, deadline.remaining() if deadline else None,
+                    stream=True
+                )
+                try:
+                    while True:
+                        text = await call.tokens.get()
+                        if text is None:
+                            break
+                        yield text
+                    if await call.future and deadline is not None:
+                        deadline.truncated = True
+                finally:
+                    if not call.future.done():
+                        self._cancel(request_id)
+                    self.calls.pop(request_id, None)
+
+    def count_tokens(self, text: str) -> Optional[int]:
+        """웹 프로세스에 따로 둔 토크나이저로 계산 (가중치는 워커에만 있음)"""
+        return self.local.count_tokens(text)
+
+    async def ensure_tokenizer(self):
+        """토큰 수 계산용 토크나이저만 웹 프로세스에 로드"""
+        await self.local.ensure_tokenizer()
+
+    def release_session(self, session_id: str):
+        """워커의 세션 자원(KV 캐시 등) 해제 (응답을 기다리지 않음)"""
+        self._notify("release", session_id)
+
+    def pin_session(self, session_id: str):
+        """워커의 세션 KV 캐시 고정 (워커가 재시작되면 고정도 사라짐)"""
+        self._notify("pin", session_id)
+
+    def unpin_session(self, session_id: str):
+        self._notify("unpin", session_id)
+
+    def _notify(self, kind: str, session_id: str):
+        """응답이 없는 세션 제어 메시지 전송"""
+        if self.conn is not None:
+            try:
+                self.conn.send((kind, session_id))
+            except (BrokenPipeError, OSError):
+                pass
+
+    def _release_weights(self):
+        """언로드 시 워커 프로세스 종료 (프로세스 메모리 전체 반환)"""
+        self._stop_process()
+        self.model = None
+
+    def memory_footprint(self) -> int:
+        """워커가 로드 후 보고한 값, 없으면 체크포인트 크기 추정"""
+        return self._footprint or self.local.memory_footprint()
+
+    def get_info(self) -> Dict[str, Any]:
+        """모델 정보 반환"""
+        return self.local.get_info()
+
+    def format_context(self, context: List[Dict[str, Any]]) -> str:
+        """실제 모델과 같은 포맷팅"""
+        return self.local.format_context(context)
+
+    def close(self):
+        """워커 프로세스 종료 (앱 종료 시)"""
+        super().close()
+        process = self.process
+        self._stop_process()
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
@@ -1,9 +1,12 @@
+import asyncio
+import time
 from typing import Dict, List, Optional, Any
 
 from app.models.base import BaseModel
 from app.models.deepseek import DeepSeekModel
 from app.models.llama import LlamaModel
 from app.core.config import settings
+from app.core.response_cache import ResponseCache
 
 class ModelRouter:
     """
@@ -13,15 +16,30 @@ class ModelRouter:
     def __init__(self):
         self.models = {}
         self.routing_map = settings.MODEL_ROUTING
+        self.preload_targets: List[BaseModel] = []  # 시작 시 로드/워밍업할 모델
+        self.preload_done = False
+        self.response_cache = ResponseCache()  # 모든 모델이 공유하는 응답 캐시
+        self.memory_budget = settings.MODEL_MEMORY_BUDGET  # 상주 모델 메모리 한도 (0이면 무제한)
+        self.loading: Dict[BaseModel, int] = {}  # 로드 중인 모델 -> 예약한 메모리 (로드가 끝나면 상주 모델로 계산)
+        self._residency = asyncio.Condition()  # 언로드 대상 선택을 한 번에 하나씩, 로드가 끝나면 대기자에게 알림
         self._initialize_models()
     
     def _initialize_models(self):
         """기본 모델 초기화"""
-        # DeepSeek 모델 등록
-        self.models["deepseek"] = DeepSeekModel()
+        # 가짜 모델 백엔드 - 같은 이름으로 등록하여 라우팅은 그대로 사용
+        if settings.MODEL_BACKEND == "fake":
+            from app.models.fake import FakeModel
+            model_classes = {"deepseek": FakeModel, "llama": FakeModel}
+        else:
+            model_classes = {"deepseek": DeepSeekModel, "llama": LlamaModel}
         
-        # Llama 모델 등록
-        self.models["llama"] = LlamaModel()
+        for name, model_cls in model_classes.items():
+            # 워커 프로세스 모드에서는 추론을 모델별 프로세스에 맡기는 클라이언트 등록
+            if settings.MODEL_WORKER_MODE == "process":
+                from app.models.remote import RemoteModel
+                self.add_model(name, RemoteModel(model_cls, name))
+            else:
+                self.add_model(name, model_cls(name))
     
     def get_model(self, model_identifier: str) -> BaseModel:
         """
@@ -38,11 +56,114 @@ class ModelRouter:
             default_model = self.routing_map.get("default", "deepseek")
             return self.models[default_model]
     
+    async def preload(self, model_identifiers: Optional[List[str]] = None, parallel: Optional[bool] = None) -> bool:
+        """
+        지정된 모델을 미리 로드하고 워밍업 (앱 시작 시 호출)
+        반환값: 모든 모델이 준비되었는지 여부
+        """
+        if model_identifiers is None:
+            model_identifiers = settings.PRELOAD_MODELS
+        if parallel is None:
+            parallel = settings.PRELOAD_PARALLEL
+        
+        # 라우팅 별칭이 같은 모델을 가리키면 한 번만 로드
+        targets = []
+        for identifier in model_identifiers:
+            model = self.get_model(identifier)
+            if model not in targets:
+                targets.append(model)
+        self.preload_targets = targets
+        
+        async def prepare(model: BaseModel) -> bool:
+            if settings.WARMUP_ENABLED:
+                return await model.warmup()
+            model.ready = await model.ensure_loaded()
+            return model.ready
+        
+        if parallel:
+            results = await asyncio.gather(*(prepare(model) for model in targets))
+        else:
+            results = [await prepare(model) for model in targets]
+        
+        self.preload_done = True
+        return all(results)
+    
+    def is_ready(self) -> bool:
+        """
+        서비스 준비 여부 - 미리 로드할 모델이 모두 워밍업을 마쳤는지
+        """
+        return self.preload_done and all(model.ready for model in self.preload_targets)
+    
     def list_models(self) -> List[Dict[str, Any]]:
         """
-        사용 가능한 모델 목록과 정보 반환
+        사용 가능한 모델 목록과 정보 (상주 상태 포함) 반환
+        """
+        return [
+            {**model.get_info(), "state": model.state, "memory_bytes": self.memory_footprint(model)}
+            for model in self.models.values()
+        ]
+    
+    def memory_footprint(self, model: BaseModel) -> int:
+        """모델 메모리 사용량 (설정값 우선)"""
+        return settings.MODEL_MEMORY_SIZES.get(model.name) or model.memory_footprint()
+    
+    async def make_room(self, model: BaseModel):
+        """
+        모델 로드 전에 메모리 예산 확보 후 로드할 메모리 예약 (BaseModel.ensure_loaded에서 호출, load_finished와 짝)
+        예산을 넘으면 사용 중이 아닌 상주 모델을 마지막 사용 시각이 오래된 순서로 언로드하고,
+        언로드할 모델이 없으면 다른 모델의 로드가 끝날 때까지 기다렸다가 다시 확인
+        """
+        if self.memory_budget <= 0:
+            return
+        
+        async with self._residency:
+            needed = self.memory_footprint(model)
+            while True:
+                # 동시에 로드 중인 모델도 예약한 메모리만큼 사용 중으로 계산
+                others = [m for m in set(self.models.values()) if m is not model]
+                resident = [m for m in others if m.is_loaded() and m not in self.loading]
+                used = sum(self.memory_footprint(m) for m in resident)
+                used += sum(reserved for m, reserved in self.loading.items() if m is not model)
+                if used + needed <= self.memory_budget:
+                    break
+                
+                idle = sorted((m for m in resident if m.active == 0), key=lambda m: m.last_used)
+                victim = None
+                for candidate in idle:
+                    if await candidate.unload():
+                        victim = candidate
+                        break
+                if victim is None:
+                    if any(m is not model for m in self.loading):
+                        # 로드가 끝난 모델이 유휴 상태면 언로드할 수 있음
+                        await self._residency.wait()
+                        continue
+                    # 모두 사용 중이면 예산을 넘더라도 로드 (요청을 실패시키지 않음)
+                    print(f"모델 메모리 예산 초과: {model.name} 로드 시 {used + needed}바이트 사용 예상 (예산 {self.memory_budget}바이트)")
+                    break
+                print(f"모델 언로드: {victim.name} (마지막 사용 {time.monotonic() - victim.last_used:.0f}초 전)")
+            self.loading[model] = needed
+    
+    async def load_finished(self, model: BaseModel):
+        """로드가 끝나면 (실패 포함) 예약 해제 후 예산을 기다리는 다른 모델에 알림"""
+        if self.loading.pop(model, None) is None:
+            return
+        async with self._residency:
+            self._residency.notify_all()
+    
+    def release_session(self, session_id: str):
+        """
+        모든 모델에서 세션 관련 자원 해제
+        """
+        for model in self.models.values():
+            model.release_session(session_id)
+    
+    def close(self):
+        """
+        모델 실행 자원(추론 스레드, 워커 프로세스) 정리 (앱 종료 시)
         """
-        return [model.get_info() for model in self.models.values()]
+        for model in set(self.models.values()):
+            model.close()
     
     def add_model(self, model_name: str, model: BaseModel) -> bool:
         """
@@ -51,6 +172,8 @@ class ModelRouter:
         if model_name in self.models:
             return False
         
+        model.response_cache = self.response_cache
+        model.residency = self
         self.models[model_name] = model
         return True
     
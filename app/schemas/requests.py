@@ -11,6 +11,10 @@ class ChatRequest(BaseModel):
     model: Optional[str] = None  # 사용할 모델, None이면 기본값 사용
     parameters: Optional[Dict[str, Any]] = None  # 온도, top_p 등 모델 파라미터
     save_context: bool = True  # 컨텍스트에 응답 저장 여부
+    stream: bool = False  # True면 토큰을 Server-Sent Events로 스트리밍
+    priority: Optional[str] = None  # 우선순위 클래스 (interactive, normal, batch), None이면 DEFAULT_PRIORITY
+    client_id: Optional[str] = None  # 공정 스케줄링 단위, None이면 세션 단위
+    timeout_ms: Optional[int] = Field(None, gt=0)  # 요청 마감(ms), 넘으면 그때까지 생성한 부분을 반환, None이면 GENERATION_TIMEOUT_MS
     
     class Config:
         schema_extra = {
@@ -21,7 +25,10 @@ class ChatRequest(BaseModel):
                 ],
                 "model": "default",
                 "parameters": {"temperature": 0.7, "max_new_tokens": 512},
-                "save_context": True
+                "save_context": True,
+                "stream": False,
+                "priority": "interactive",
+                "timeout_ms": 10000
             }
         }
 
@@ -29,6 +36,30 @@ class ChatResponse(BaseModel):
     session_id: str
     response: str
     model: str
+    truncated: bool = False  # 마감(timeout_ms)에 걸려 생성이 도중에 멈췄는지 여부
+    
+class BatchChatRequest(BaseModel):
+    requests: List[ChatRequest]  # 서로 독립적인 채팅 요청 (각 요청의 stream은 무시)
+    stream: bool = False  # True면 끝나는 순서대로 결과를 NDJSON 한 줄씩 전송
+
+class BatchChatResult(BaseModel):
+    index: int  # requests에서의 위치
+    status_code: int = 200
+    result: Optional[ChatResponse] = None
+    detail: Optional[str] = None  # 실패 시 오류 내용
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult]  # 입력 순서
+    
+class JobInfo(BaseModel):
+    job_id: str
+    status: str  # queued, running, succeeded, failed, cancelled
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ChatResponse] = None  # succeeded일 때 생성 결과
+    status_code: Optional[int] = None  # 끝난 작업의 /api/chat 기준 상태 코드
+    detail: Optional[str] = None  # 실패/취소 사유
     
 class ModelInfo(BaseModel):
     id: str
@@ -36,6 +67,8 @@ class ModelInfo(BaseModel):
     description: Optional[str] = None
     capabilities: List[str] = []
     languages: List[str] = []
+    state: Optional[str] = None  # resident, loading, unloaded
+    memory_bytes: Optional[int] = None  # 로드 시 메모리 사용량 추정치
     
 class AvailableModelsResponse(BaseModel):
     models: List[ModelInfo]
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+프리포크 서버 - 마스터 프로세스가 모델 가중치를 한 번 로드한 뒤 워커 프로세스를 fork
+가중치 텐서 페이지는 copy-on-write로 모든 워커가 공유하므로 워커 수만큼 메모리가 늘지 않음
+(uvicorn --workers는 워커마다 앱을 새로 임포트해 가중치를 따로 로드)
+
+- 공유 대상은 PRELOAD_MODELS 모델, 워밍업은 각 워커가 시작할 때 수행
+- 워커는 마스터가 연 소켓을 함께 accept하고, 종료된 워커는 마스터가 다시 fork
+- CUDA는 fork 후 사용할 수 없으므로 GPU에서는 워커마다 따로 로드
+
+사용 예:
+    PRELOAD_MODELS='["deepseek"]' python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+from app.core.config import settings
+
+def _bind(host: str, port: int) -> socket.socket:
+    """워커들이 공유할 리스닝 소켓"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+def _load_shared_weights() -> bool:
+    """마스터에서 PRELOAD_MODELS 가중치 로드 후 fork 전에 추론 스레드 정리"""
+    from app.api.routes import model_router
+
+    targets = []
+    for identifier in settings.PRELOAD_MODELS:
+        model = model_router.get_model(identifier)
+        if model not in targets:
+            targets.append(model)
+
+    async def load_all():
+        return await asyncio.gather(*(model.ensure_loaded() for model in targets))
+
+    start = time.perf_counter()
+    results = asyncio.run(load_all())
+    for model in targets:
+        model.executor.shutdown(wait=True)
+    print(f"마스터에서 공유 모델 로드: {[m.name for m in targets]} ({time.perf_counter() - start:.1f}초)")
+    return all(results)
+
+def _run_worker(sock: socket.socket, args: argparse.Namespace):
+    """워커 프로세스 - 공유 소켓으로 uvicorn 실행"""
+    import uvicorn
+    from app.main import app
+
+    # 마스터의 시그널 핸들러 대신 uvicorn 기본 동작 사용
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def _spawn(sock: socket.socket, args: argparse.Namespace) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(sock, args)
+        except BaseException as e:
+            print(f"워커 {os.getpid()} 오류: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 프리포크 서버 (모델 가중치 공유)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--no-share-weights", dest="share_weights", action="store_false",
+                        default=settings.SERVE_SHARE_WEIGHTS, help="워커마다 가중치를 따로 로드")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # 앱을 마스터에서 한 번 임포트 (워커는 fork로 그대로 물려받음)
+    import app.main  # noqa: F401
+
+    if args.share_weights and settings.PRELOAD_MODELS:
+        if settings.MODEL_WORKER_MODE == "process":
+            print("모델 워커 프로세스 모드에서는 가중치를 공유하지 않습니다 (워커마다 모델 프로세스 시작)")
+        elif _cuda_available():
+            print("CUDA 사용 시 fork 후 가중치를 공유할 수 없어 워커마다 로드합니다")
+        elif not _load_shared_weights():
+            print("일부 모델을 마스터에서 로드하지 못했습니다 (워커가 첫 요청 때 다시 시도)")
+
+    # 공유 객체를 gc 대상에서 빼서 워커의 gc가 공유 페이지를 건드려 복사되지 않도록 함
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    workers: Dict[int, float] = {}  # pid -> 시작 시각
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        workers[_spawn(sock, args)] = time.monotonic()
+    print(f"프리포크 서버 시작: http://{args.host}:{args.port} (워커 {args.workers}개, 가중치 공유 {args.share_weights})")
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"워커 {pid} 종료 (상태 {status}), 다시 시작합니다")
+        # 시작 직후 계속 죽는 워커가 CPU를 점유하지 않도록 잠시 대기
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        workers[_spawn(sock, args)] = time.monotonic()
+
+    sock.close()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
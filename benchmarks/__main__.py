@@ -0,0 +1,4 @@
+from benchmarks.chat_load import main
+
+if __name__ == "__main__":
+    main()
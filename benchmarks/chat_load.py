@@ -0,0 +1,198 @@
+"""
+/api/chat 부하 테스트 - 가짜 모델로 체크포인트 없이 서버 오버헤드 측정
+(컨텍스트 스토리지, 토큰 예산 윈도잉, 추론 실행기 대기열, 스트리밍 등)
+
+컨텍스트 스토리지 백엔드 x 시작 대화 길이(턴 수) 조합마다
+동시 클라이언트가 각자의 세션으로 /api/chat을 호출하고 지연 분위수, 처리량, 메모리를 보고
+
+사용 예:
+    python -m benchmarks --backends memory sqlite redis --turns 1 10 100 500
+    python -m benchmarks --requests 500 --concurrency 32 --stream --json result.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+def _rss_mb() -> float:
+    """현재 RSS(MB) - /proc이 없으면 최대 RSS로 대체"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (ms)"""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(values) == 1:
+        return {"p50": values[0], "p95": values[0], "p99": values[0]}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+def _history(turns: int, words: int) -> List[Dict[str, Any]]:
+    """turns번 주고받은 대화 기록"""
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "lorem " * words})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "ipsum " * words})
+    return messages
+
+async def _open_context_manager(backend: str, sqlite_dir: str):
+    """백엔드별 ContextManager 생성 (연결할 수 없으면 None)"""
+    from app.core.context import ContextManager
+
+    settings.CONTEXT_STORAGE = backend
+    settings.SQLITE_PATH = os.path.join(sqlite_dir, f"bench-{uuid4().hex}.db")
+    manager = ContextManager()
+    if backend == "redis":
+        try:
+            await manager.redis.ping()
+        except Exception as e:
+            print(f"[{backend}] Redis에 연결할 수 없어 건너뜁니다: {e}")
+            await manager.close()
+            return None
+    return manager
+
+async def run_case(args: argparse.Namespace, backend: str, turns: int, sqlite_dir: str) -> Optional[Dict[str, Any]]:
+    """한 (백엔드, 대화 길이) 조합 실행"""
+    import httpx
+    from app.api import routes
+    from app.core.windowing import annotate_token_counts
+    from app.main import app
+
+    manager = await _open_context_manager(backend, sqlite_dir)
+    if manager is None:
+        return None
+
+    previous = routes.context_manager
+    routes.context_manager = manager
+    model = routes.model_router.get_model(args.model)
+
+    # 클라이언트별 세션에 대화 기록을 미리 채움 (토큰 수도 실제 요청처럼 함께 저장)
+    sessions = [f"bench-{uuid4().hex}" for _ in range(args.concurrency)]
+    for session_id in sessions:
+        await manager.update_context(session_id, annotate_token_counts(_history(turns, args.words), model))
+
+    payload = {
+        "model": args.model,
+        "stream": args.stream,
+        "parameters": {"max_new_tokens": args.output_tokens, "do_sample": False}
+    }
+    latencies: List[float] = []
+    errors = 0
+    remaining = args.requests
+
+    async def client(http: httpx.AsyncClient, session_id: str):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            body = {**payload, "session_id": session_id,
+                    "messages": [{"role": "user", "content": "next " + "lorem " * args.words}]}
+            start = time.perf_counter()
+            try:
+                response = await http.post("/api/chat", json=body)
+                # 스트리밍 오류는 200 응답 안의 error 이벤트로 전달됨
+                ok = response.status_code == 200 and "event: error" not in response.text
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    rss_before = _rss_mb()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        # 첫 요청(모델 로드 등)은 측정에서 제외
+        await http.post("/api/chat", json={**payload, "stream": False, "messages": [{"role": "user", "content": "warmup"}]})
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http, session_id) for session_id in sessions))
+        elapsed = time.perf_counter() - started
+    rss_after = _rss_mb()
+
+    for session_id in sessions:
+        await manager.delete_context(session_id)
+    await manager.close()
+    routes.context_manager = previous
+
+    result = {
+        "backend": backend,
+        "turns": turns,
+        "requests": len(latencies),
+        "errors": errors,
+        "latency_ms": _percentiles(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "rss_mb": rss_after,
+        "rss_delta_mb": rss_after - rss_before
+    }
+    return result
+
+def _print_row(result: Dict[str, Any]):
+    latency = result["latency_ms"]
+    row = (
+        f"{result['backend']:<8}{result['turns']:>6}{result['requests']:>7}{result['errors']:>6}"
+        f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+        f"{result['throughput_rps']:>10.1f}{result['rss_mb']:>9.1f}{result['rss_delta_mb']:>+8.1f}"
+    )
+    print(row, flush=True)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MCP 서버 /api/chat 부하 테스트 (가짜 모델)")
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite", "redis"],
+                        choices=["memory", "sqlite", "redis"], help="컨텍스트 스토리지 백엔드")
+    parser.add_argument("--turns", nargs="+", type=int, default=[1, 10, 100, 500], help="세션의 시작 대화 길이(턴 수)")
+    parser.add_argument("--requests", type=int, default=200, help="조합당 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 클라이언트(세션) 수")
+    parser.add_argument("--model", default="default", help="요청할 모델 이름 또는 라우팅 키")
+    parser.add_argument("--words", type=int, default=20, help="메시지당 단어 수")
+    parser.add_argument("--stream", action="store_true", help="스트리밍(SSE) 요청으로 측정")
+    parser.add_argument("--prefill-ms", type=float, default=settings.FAKE_PREFILL_MS)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=settings.FAKE_PREFILL_MS_PER_TOKEN)
+    parser.add_argument("--token-ms", type=float, default=settings.FAKE_TOKEN_MS)
+    parser.add_argument("--output-tokens", type=int, default=settings.FAKE_OUTPUT_TOKENS)
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    return parser.parse_args(argv)
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    header = (
+        f"{'backend':<8}{'turns':>6}{'reqs':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>10}{'rss MB':>9}{'Δrss':>8}"
+    )
+    print(header)
+
+    results = []
+    with tempfile.TemporaryDirectory() as sqlite_dir:
+        for backend in args.backends:
+            for turns in args.turns:
+                result = await run_case(args, backend, turns, sqlite_dir)
+                if result is None:
+                    break  # 백엔드에 연결할 수 없음
+                _print_row(result)
+                results.append(result)
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    # 앱을 임포트하기 전에 가짜 모델 백엔드로 전환 (라우터가 임포트 시점에 모델을 등록)
+    settings.MODEL_BACKEND = "fake"
+    settings.PRELOAD_MODELS = []
+    settings.FAKE_PREFILL_MS = args.prefill_ms
+    settings.FAKE_PREFILL_MS_PER_TOKEN = args.prefill_ms_per_token
+    settings.FAKE_TOKEN_MS = args.token_ms
+    settings.FAKE_OUTPUT_TOKENS = args.output_tokens
+
+    results = asyncio.run(run(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
@@ -0,0 +1,75 @@
+"""
+앱 임포트 시간 예산 확인 - 새 프로세스에서 app.main 임포트와 첫 요청(/, /api/models)까지의 시간을 측정
+torch/transformers 같은 무거운 모듈이 임포트 시점에 로드되면 실패 (종료 코드 1)
+
+사용 예:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 500 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+# 첫 모델 로드 전까지 임포트되면 안 되는 모듈
+HEAVY_MODULES = ("torch", "transformers", "accelerate")
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+import asyncio, httpx
+
+async def first_requests():
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for path in ("/", "/api/models"):
+            response = await http.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+
+asyncio.run(first_requests())
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (served - start) * 1000,
+    "heavy_modules": [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+def measure_once() -> Dict[str, Any]:
+    """새 인터프리터에서 한 번 측정"""
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _CHILD],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="앱 임포트 시간 예산 확인")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="첫 요청 응답까지 허용 시간(ms)")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 횟수 (중앙값 사용)")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.repeat)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_request_ms = statistics.median(run["first_request_ms"] for run in runs)
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+
+    print(f"app.main 임포트: {import_ms:.1f} ms")
+    print(f"첫 요청(/, /api/models) 응답까지: {first_request_ms:.1f} ms (예산 {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"실패: 임포트 시점에 무거운 모듈이 로드됨: {', '.join(heavy)}")
+        failed = True
+    if first_request_ms > args.budget_ms:
+        print("실패: 시간 예산 초과")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+프리포크 서버 메모리 비교 - 마스터가 가중치를 로드해 워커가 공유하는 경우와
+워커마다 따로 로드하는 경우(uvicorn --workers와 같음)의 프로세스별 RSS/PSS 측정
+
+PSS는 공유 페이지를 공유하는 프로세스 수로 나눈 값이므로 합계가 실제 메모리 사용량에 가까움
+
+사용 예:
+    PRELOAD_MODELS='["deepseek"]' DEEPSEEK_MODEL_PATH=./models/deepseek \\
+        python -m benchmarks.prefork_rss --workers 4
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """/proc/<pid>/smaps_rollup의 Rss/Pss/Shared 값(kB)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(":") in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+def _children(pid: int) -> List[int]:
+    """pid의 자식 프로세스 목록"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm에 공백이 있을 수 있으므로 마지막 ')' 뒤에서 ppid를 읽음
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+def _request(url: str, body: Optional[dict] = None, timeout: float = 60) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return 0
+
+def measure(share: bool, args: argparse.Namespace) -> Dict[str, int]:
+    """서버를 띄워 모든 워커가 준비될 때까지 기다린 뒤 메모리 측정"""
+    command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(args.port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    if not share:
+        command.append("--no-share-weights")
+    server = subprocess.Popen(command)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.monotonic() + args.timeout
+        # 워커마다 /ready가 200이 될 때까지 (요청은 임의의 워커로 가므로 연속 성공 횟수로 판단)
+        ready_streak = 0
+        while ready_streak < args.workers * 4:
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError("서버가 준비되지 않았습니다")
+            ready_streak = ready_streak + 1 if _request(f"{base}/ready") == 200 else 0
+            time.sleep(0.05 if ready_streak else 0.5)
+
+        # 가중치를 실제로 읽도록 몇 번 생성
+        for i in range(args.workers * 2):
+            _request(f"{base}/api/chat", {
+                "messages": [{"role": "user", "content": f"hello {i}"}],
+                "parameters": {"max_new_tokens": 4, "do_sample": False}
+            })
+
+        rows = [("master", server.pid)] + [("worker", pid) for pid in _children(server.pid)]
+        total = {"Rss": 0, "Pss": 0}
+        print(f"\n[{'가중치 공유' if share else '워커별 로드'}] 워커 {args.workers}개")
+        print(f"{'process':<8}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}")
+        for label, pid in rows:
+            memory = _memory_kb(pid)
+            shared = memory.get("Shared_Clean", 0) + memory.get("Shared_Dirty", 0)
+            print(f"{label:<8}{pid:>8}{memory['Rss'] / 1024:>10.1f}{memory['Pss'] / 1024:>10.1f}{shared / 1024:>11.1f}")
+            total["Rss"] += memory["Rss"]
+            total["Pss"] += memory["Pss"]
+        print(f"{'total':<16}{total['Rss'] / 1024:>10.1f}{total['Pss'] / 1024:>10.1f}")
+        return total
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="프리포크 서버 프로세스별 메모리 측정")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600, help="서버 준비 대기 시간(초)")
+    args = parser.parse_args(argv)
+
+    if not json.loads(os.environ.get("PRELOAD_MODELS", "[]")):
+        parser.error('공유할 모델을 PRELOAD_MODELS 환경 변수로 지정하세요 (예: PRELOAD_MODELS=\'["deepseek"]\')')
+
+    shared = measure(True, args)
+    separate = measure(False, args)
+    print(f"\nPSS 합계: 공유 {shared['Pss'] / 1024:.1f} MB / 워커별 로드 {separate['Pss'] / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    main()
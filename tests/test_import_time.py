@@ -0,0 +1,27 @@
+"""
+앱 임포트 시점에 무거운 모듈이 로드되지 않는지 확인
+(시간 예산 측정은 python -m benchmarks.import_time)
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 첫 모델 로드 전까지 임포트되면 안 되는 모듈
+HEAVY_MODULES = ("torch", "transformers", "accelerate")
+
+def test_app_import_does_not_load_heavy_modules():
+    # 다른 테스트가 이미 임포트했을 수 있으므로 새 인터프리터에서 확인
+    code = (
+        "import json, sys\n"
+        "import app.main\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    loaded = json.loads(output.strip().splitlines()[-1])
+    assert loaded == [], f"app.main 임포트 시점에 로드됨: {', '.join(loaded)}"